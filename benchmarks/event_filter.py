@@ -0,0 +1,99 @@
+import argparse
+import random
+import time
+
+import orjson
+
+from classes import recorder
+from classes.consumer import disabled_event
+
+parser = argparse.ArgumentParser(description="Benchmark pre-parse gateway event filtering.")
+parser.add_argument("--file", help="Gateway recording made with GATEWAY_RECORD.")
+parser.add_argument("--events", type=int, default=100000, help="Synthetic events to generate.")
+parser.add_argument("--runs", type=int, default=5)
+args = parser.parse_args()
+
+ENABLED = {
+    "CHANNEL_CREATE",
+    "CHANNEL_DELETE",
+    "CHANNEL_UPDATE",
+    "GUILD_CREATE",
+    "GUILD_DELETE",
+    "GUILD_EMOJIS_UPDATE",
+    "GUILD_MEMBER_ADD",
+    "GUILD_MEMBER_REMOVE",
+    "GUILD_MEMBER_UPDATE",
+    "GUILD_ROLE_CREATE",
+    "GUILD_ROLE_DELETE",
+    "GUILD_ROLE_UPDATE",
+    "GUILD_UPDATE",
+    "MESSAGE_CREATE",
+    "MESSAGE_REACTION_ADD",
+    "READY",
+}
+
+USER = {"id": "1", "username": "Benchmark", "discriminator": "0001", "avatar": "a" * 32}
+MEMBER = {"user": USER, "roles": [str(x) for x in range(10)], "joined_at": "2020-01-01T00:00:00"}
+ACTIVITY = {"name": "Benchmark", "type": 0, "created_at": 0, "assets": {"large_text": "x" * 64}}
+
+SAMPLES = [
+    (30, "TYPING_START", {"channel_id": "10", "user_id": "1", "member": MEMBER, "timestamp": 0}),
+    (25, "PRESENCE_UPDATE", {"user": USER, "guild_id": "2", "activities": [ACTIVITY] * 3}),
+    (15, "MESSAGE_CREATE", {"id": "3", "channel_id": "10", "author": USER, "content": "x" * 200}),
+    (10, "MESSAGE_UPDATE", {"id": "3", "channel_id": "10", "content": 'quoted "t":"READY"'}),
+    (10, "GUILD_MEMBER_UPDATE", dict(MEMBER, guild_id="2")),
+    (5, "MESSAGE_REACTION_ADD", {"channel_id": "10", "message_id": "3", "member": MEMBER}),
+    (5, "VOICE_STATE_UPDATE", {"guild_id": "2", "channel_id": None, "member": MEMBER}),
+]
+
+
+def load():
+    if args.file:
+        return [body for _, body in recorder.read(args.file)]
+
+    weights = [x[0] for x in SAMPLES]
+    return [
+        orjson.dumps({"op": 0, "s": index, "t": sample[1], "d": sample[2]})
+        for index, sample in enumerate(random.choices(SAMPLES, weights, k=args.events))
+    ]
+
+
+def decode_all(bodies):
+    return sum(1 for x in bodies if orjson.loads(x).get("t") not in ENABLED)
+
+
+def scan_first(bodies):
+    enabled = {x.encode("utf-8") for x in ENABLED}
+    dropped = 0
+
+    for body in bodies:
+        if disabled_event(body, enabled) is not None:
+            dropped += 1
+        else:
+            orjson.loads(body)
+
+    return dropped
+
+
+def measure(name, func, bodies):
+    best = None
+    for _ in range(args.runs):
+        start = time.perf_counter()
+        dropped = func(bodies)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"{name:<24}{best / len(bodies) * 1e6:>10.3f} us/event{dropped:>10} dropped")
+    return best
+
+
+def main():
+    bodies = load()
+    print(f"Loaded {len(bodies)} events.")
+
+    old = measure("Decode then filter", decode_all, bodies)
+    new = measure("Scan then decode", scan_first, bodies)
+    print(f"{'Speedup':<24}{old / new:>10.1f} x")
+
+
+main()
@@ -0,0 +1,111 @@
+import argparse
+import time
+import tracemalloc
+
+from types import SimpleNamespace
+
+from classes.channel import TextChannel
+from classes.guild import Guild
+from classes.member import Member
+
+parser = argparse.ArgumentParser(description="Benchmark lazy Guild, TextChannel and Member views.")
+parser.add_argument("--count", type=int, default=100000)
+args = parser.parse_args()
+
+GUILD = {
+    "id": "1",
+    "name": "Benchmark",
+    "owner_id": "2",
+    "region": "us-east",
+    "member_count": 5000,
+    "verification_level": 1,
+    "default_message_notifications": 1,
+    "explicit_content_filter": 2,
+    "afk_timeout": 300,
+    "afk_channel_id": "3",
+    "system_channel_id": "4",
+    "rules_channel_id": "5",
+    "features": ["COMMUNITY"],
+    "premium_tier": 2,
+    "premium_subscription_count": 14,
+    "preferred_locale": "en-US",
+}
+
+CHANNEL = {
+    "id": "10",
+    "guild_id": "1",
+    "type": 0,
+    "name": "general",
+    "parent_id": "11",
+    "topic": "Benchmark",
+    "position": 4,
+    "permission_overwrites": [
+        {"id": "1", "type": "role", "allow": "0", "deny": "1024"},
+        {"id": "12", "type": "role", "allow": "1024", "deny": "0"},
+    ],
+}
+
+MEMBER = {
+    "user": {"id": "20", "username": "Benchmark", "discriminator": "0001", "avatar": None},
+    "roles": ["12", "13", "14"],
+    "joined_at": "2020-01-01T00:00:00.000000+00:00",
+    "nick": "Bench",
+}
+
+state = SimpleNamespace(store_user=lambda x: SimpleNamespace(id=int(x["id"])))
+guild = Guild(data=GUILD, state=state)
+
+
+def build_guild():
+    return Guild(data=GUILD, state=state)
+
+
+def build_channel():
+    return TextChannel(state=state, guild=guild, data=CHANNEL)
+
+
+def build_member():
+    return Member(data=MEMBER, guild=guild, state=state)
+
+
+def touch(obj, access):
+    access(obj)
+    return obj
+
+
+def materialise(obj):
+    for name in obj._fields:
+        getattr(obj, name)
+    return obj
+
+
+CASES = [
+    ("Guild", build_guild, lambda x: (x.id, x.name, x.owner_id)),
+    ("TextChannel", build_channel, lambda x: (x.id, x.name, x.category_id)),
+    ("Member", build_member, lambda x: (x.id, x._roles)),
+]
+
+
+def measure(name, func):
+    objects = []
+    tracemalloc.start()
+    start = time.process_time()
+    for _ in range(args.count):
+        objects.append(func())
+    elapsed = time.process_time() - start
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"{name:<36}{elapsed / args.count * 1e6:>10.2f} us{memory / args.count:>10.0f} B")
+
+
+def main():
+    print(f"{'':<36}{'CPU/obj':>13}{'Mem/obj':>12}")
+
+    for name, build, access in CASES:
+        measure(f"{name} (construct)", build)
+        measure(f"{name} (typical access)", lambda: touch(build(), access))
+        measure(f"{name} (fully materialised)", lambda: materialise(build()))
+
+
+main()
@@ -0,0 +1,202 @@
+import argparse
+import asyncio
+import itertools
+import os
+import time
+
+import asyncpg
+import orjson
+
+from aiohttp import web
+from discord.http import Route
+
+from classes import recorder
+from classes.bot import ModMail
+from classes.consumer import Consumer, disabled_event, parse_lanes
+from utils import tools
+from utils.config import Config
+
+config = Config().load()
+
+parser = argparse.ArgumentParser(description="Replay a gateway recording through the worker.")
+parser.add_argument("file", help="Gateway recording made with GATEWAY_RECORD.")
+parser.add_argument("--bot-id", type=int, required=True)
+parser.add_argument("--redis-host", default="127.0.0.1")
+parser.add_argument("--redis-port", required=True, help="Stand-in Redis with a state snapshot.")
+parser.add_argument("--postgres-database", required=True, help="Stand-in Postgres database.")
+parser.add_argument("--rest-port", type=int, default=6199, help="Port for the fake REST server.")
+parser.add_argument("--cluster", type=int, default=99, help="Cluster id, sets the metrics port.")
+args = parser.parse_args()
+
+os.environ["REDIS_HOST"] = args.redis_host
+os.environ["REDIS_PORT"] = args.redis_port
+os.environ["POSTGRES_DATABASE"] = args.postgres_database
+
+
+class Message:
+    def __init__(self, body):
+        self.body = body
+        self.redelivered = False
+
+
+class Counter:
+    def __init__(self):
+        self.count = 0
+
+    def wrap(self, func):
+        def wrapper(*args, **kwargs):
+            self.count += 1
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def wrap_transaction(self, func):
+        def wrapper(*args, **kwargs):
+            transaction = func(*args, **kwargs)
+            transaction.execute = self.wrap(transaction.execute)
+            return transaction
+
+        return wrapper
+
+    def log(self, _record):
+        self.count += 1
+
+
+snowflakes = itertools.count(int(time.time() * 1000 - 1420070400000) << 22)
+
+
+async def fake_rest(request):
+    body = await request.read()
+    data = orjson.loads(body) if body and request.content_type == "application/json" else {}
+
+    if request.method == "GET" and request.path.endswith("/messages"):
+        return web.json_response([])
+
+    if request.method in ["POST", "PATCH"] and "/messages" in request.path:
+        channel_id = request.path.split("/")[4]
+        return web.json_response(
+            {
+                "id": str(next(snowflakes)),
+                "channel_id": channel_id,
+                "type": 0,
+                "content": data.get("content") or "",
+                "embeds": data.get("embeds") or ([data["embed"]] if data.get("embed") else []),
+                "attachments": [],
+                "mentions": [],
+                "mention_roles": [],
+                "pinned": False,
+                "mention_everyone": False,
+                "tts": False,
+                "timestamp": "2020-01-01T00:00:00+00:00",
+                "edited_timestamp": None,
+                "author": tools.create_fake_user(args.bot_id)._to_minimal_user_json(),
+            }
+        )
+
+    if request.method == "POST" and request.path.endswith("/channels"):
+        return web.json_response(dict(data, id=str(next(snowflakes)), type=data.get("type", 0)))
+
+    if request.method == "POST" and request.path.endswith("/users/@me/channels"):
+        return web.json_response({"id": str(next(snowflakes)), "type": 1, "recipients": []})
+
+    return web.Response(status=204)
+
+
+async def start_rest():
+    app = web.Application()
+    app.router.add_route("*", "/{tail:.*}", fake_rest)
+
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", args.rest_port).start()
+
+    Route.BASE = f"http://127.0.0.1:{args.rest_port}/api/v8"
+
+
+async def command_prefix(bot, message):
+    prefix = await tools.get_guild_prefix(bot, message.guild)
+    return [f"<@{bot.id}> ", f"<@!{bot.id}> ", prefix]
+
+
+def percentile(values, percent):
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def main():
+    await start_rest()
+
+    bot = ModMail(
+        command_prefix=command_prefix,
+        bot_id=args.bot_id,
+        cluster_id=args.cluster,
+        cluster_count=1,
+        version="replay",
+    )
+    await bot.start(worker=False)
+
+    for extension in bot._cogs:
+        bot.load_extension("cogs." + extension)
+
+    redis_calls = Counter()
+    bot._redis.execute = redis_calls.wrap(bot._redis.execute)
+    bot._redis.multi_exec = redis_calls.wrap_transaction(bot._redis.multi_exec)
+    bot._redis.pipeline = redis_calls.wrap_transaction(bot._redis.pipeline)
+
+    sql_calls = Counter()
+    await bot.pool.close()
+    bot.pool = await asyncpg.create_pool(
+        database=config.POSTGRES_DATABASE,
+        user=config.POSTGRES_USERNAME,
+        password=config.POSTGRES_PASSWORD,
+        host=config.POSTGRES_HOST,
+        port=int(config.POSTGRES_PORT),
+        max_size=10,
+        command_timeout=60,
+        init=lambda conn: conn.add_query_logger(sql_calls.log),
+    )
+
+    async for key in bot._redis.iscan(match="event_seen:*"):
+        await bot._redis.delete(key)
+
+    consumer = Consumer(
+        bot,
+        queue=None,
+        lanes=parse_lanes(None),
+        concurrency=1,
+        timeout=30,
+        ack_batch=1,
+        dedupe_ttl=300,
+        shed_depths=[],
+    )
+    enabled = {x.encode("utf-8") for x in bot._enabled_events}
+
+    latencies = []
+    dropped = 0
+    redis_start, sql_start = redis_calls.count, sql_calls.count
+    start = time.perf_counter()
+
+    for _, body in recorder.read(args.file):
+        if disabled_event(body, enabled) is not None:
+            dropped += 1
+            continue
+
+        event_start = time.perf_counter()
+        await consumer._handle(Message(body), orjson.loads(body), bot.loop.time())
+        latencies.append(time.perf_counter() - event_start)
+
+    elapsed = time.perf_counter() - start
+    events = len(latencies)
+    latencies.sort()
+
+    print(f"{'Events handled':<28}{events:>12}")
+    print(f"{'Events dropped early':<28}{dropped:>12}")
+
+    if events:
+        print(f"{'Events per second':<28}{events / elapsed:>12.1f}")
+        print(f"{'p50 latency':<28}{percentile(latencies, 50) * 1000:>9.2f} ms")
+        print(f"{'p99 latency':<28}{percentile(latencies, 99) * 1000:>9.2f} ms")
+        print(f"{'Redis calls per event':<28}{(redis_calls.count - redis_start) / events:>12.2f}")
+        print(f"{'SQL queries per event':<28}{(sql_calls.count - sql_start) / events:>12.2f}")
+
+
+asyncio.get_event_loop().run_until_complete(main())
@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import time
+
+import aioredis
+import orjson
+
+from classes.state import State
+from utils.config import Config
+
+config = Config().load()
+
+parser = argparse.ArgumentParser(description="Benchmark the Redis state indexes.")
+parser.add_argument("--db", type=int, default=15, help="Scratch Redis database, will be flushed.")
+parser.add_argument("--members", type=int, default=50000)
+parser.add_argument("--channels", type=int, default=500)
+parser.add_argument("--roles", type=int, default=250)
+parser.add_argument("--runs", type=int, default=20)
+args = parser.parse_args()
+
+GUILD_ID = 1
+
+
+def chunks(items, size=1000):
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+async def populate(redis):
+    await redis.flushdb()
+
+    guild = {"id": str(GUILD_ID), "name": "Benchmark", "member_count": args.members}
+    await redis.set(f"guild:{GUILD_ID}", orjson.dumps(guild))
+    await redis.sadd("guild_keys", f"guild:{GUILD_ID}")
+
+    items = []
+    for i in range(args.channels):
+        items.append(
+            (
+                f"channel:{1000000 + i}",
+                {"id": str(1000000 + i), "guild_id": str(GUILD_ID), "type": 0, "name": str(i)},
+            )
+        )
+    for i in range(args.roles):
+        items.append(
+            (
+                f"role:{GUILD_ID}:{2000000 + i}",
+                {"id": str(2000000 + i), "name": str(i), "permissions": "0", "position": i},
+            )
+        )
+    for i in range(args.members):
+        user = {"id": str(3000000 + i), "username": str(i), "discriminator": "0"}
+        items.append((f"member:{GUILD_ID}:{3000000 + i}", {"user": user, "roles": []}))
+
+    for chunk in chunks(items):
+        await redis.mset(*[y for x in chunk for y in (x[0], orjson.dumps(x[1]))])
+        await redis.sadd(f"guild_keys:{GUILD_ID}", *[x[0] for x in chunk])
+
+        for prefix in ["channel", "role", "member"]:
+            keys = [x[0] for x in chunk if x[0].startswith(f"{prefix}:")]
+            if keys:
+                await redis.sadd(f"{prefix}_keys", *keys)
+
+
+async def measure(name, func):
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        await func()
+    elapsed = (time.perf_counter() - start) / args.runs
+    print(f"{name:<36}{elapsed * 1000:>10.2f} ms")
+    return elapsed
+
+
+async def main():
+    redis = await aioredis.create_redis_pool(
+        (config.REDIS_HOST, int(config.REDIS_PORT)),
+        password=config.REDIS_PASSWORD,
+        db=args.db,
+        minsize=1,
+        maxsize=2,
+    )
+    state = State(
+        dispatch=None,
+        handlers={},
+        hooks={},
+        http=None,
+        loop=asyncio.get_event_loop(),
+        redis=redis,
+        id=0,
+    )
+
+    print(f"Populating {args.members} members, {args.channels} channels, {args.roles} roles...")
+    await populate(redis)
+
+    user_id = 3000000 + args.members - 1
+
+    start = time.perf_counter()
+    await state._index("channel", GUILD_ID)
+    await state._index("role", GUILD_ID)
+    await state._lookup("member", user_id)
+    print(f"{'Index build (one-off)':<36}{(time.perf_counter() - start) * 1000:>10.2f} ms")
+
+    cases = [
+        (
+            "Guild channels",
+            lambda: state._members_get_all("guild", key_id=GUILD_ID, name="channel"),
+            lambda: state._index_get_all("channel", GUILD_ID),
+        ),
+        (
+            "Guild roles",
+            lambda: state._members_get_all("guild", key_id=GUILD_ID, name="role"),
+            lambda: state._index_get_all("role", GUILD_ID),
+        ),
+        (
+            "User lookup",
+            lambda: state._members_get("member", second=user_id),
+            lambda: state._lookup("member", user_id),
+        ),
+    ]
+
+    for name, old, new in cases:
+        old_time = await measure(f"{name} (scan)", old)
+        new_time = await measure(f"{name} (index)", new)
+        print(f"{name + ' speedup':<36}{old_time / new_time:>10.1f} x")
+
+    await redis.flushdb()
+    redis.close()
+    await redis.wait_closed()
+
+
+asyncio.run(main())
@@ -0,0 +1,86 @@
+import argparse
+import asyncio
+import time
+
+import aioredis
+import orjson
+
+from classes.state import State
+from utils.config import Config
+
+config = Config().load()
+
+parser = argparse.ArgumentParser(description="Benchmark State.get_user lookups.")
+parser.add_argument("--db", type=int, default=15, help="Scratch Redis database, will be flushed.")
+parser.add_argument("--guilds", type=int, default=100)
+parser.add_argument("--members", type=int, default=1000, help="Members per guild.")
+parser.add_argument("--runs", type=int, default=50)
+args = parser.parse_args()
+
+
+async def populate(redis):
+    await redis.flushdb()
+
+    for guild_id in range(1, args.guilds + 1):
+        items = []
+        for i in range(args.members):
+            user = {"id": str(3000000 + i), "username": str(i), "discriminator": "0"}
+            items.append((f"member:{guild_id}:{3000000 + i}", {"user": user, "roles": []}))
+
+        await redis.mset(*[y for x in items for y in (x[0], orjson.dumps(x[1]))])
+        await redis.sadd("member_keys", *[x[0] for x in items])
+
+
+async def measure(name, func):
+    start = time.perf_counter()
+    for _ in range(args.runs):
+        assert await func() is not None
+    elapsed = (time.perf_counter() - start) / args.runs
+    print(f"{name:<36}{elapsed * 1000:>10.3f} ms")
+    return elapsed
+
+
+async def main():
+    redis = await aioredis.create_redis_pool(
+        (config.REDIS_HOST, int(config.REDIS_PORT)),
+        password=config.REDIS_PASSWORD,
+        db=args.db,
+        minsize=1,
+        maxsize=2,
+    )
+    state = State(
+        dispatch=None,
+        handlers={},
+        hooks={},
+        http=None,
+        loop=asyncio.get_event_loop(),
+        redis=redis,
+        id=0,
+    )
+
+    print(f"Populating {args.guilds} guilds with {args.members} members each...")
+    await populate(redis)
+
+    user_id = 3000000 + args.members - 1
+
+    start = time.perf_counter()
+    await state._lookup("member", user_id)
+    print(f"{'Lookup build (one-off)':<36}{(time.perf_counter() - start) * 1000:>10.3f} ms")
+
+    old_time = await measure(
+        "member_keys scan", lambda: state._members_get("member", second=user_id)
+    )
+    lookup_time = await measure("member_lookup hash", lambda: state._lookup("member", user_id))
+
+    await state.get_user(user_id)
+    new_time = await measure("user key", lambda: state.get_user(user_id))
+
+    print(f"{'Speedup (hash)':<36}{old_time / lookup_time:>10.1f} x")
+    print(f"{'Speedup (user key)':<36}{old_time / new_time:>10.1f} x")
+
+    await redis.flushdb()
+    redis.close()
+    await redis.wait_closed()
+
+
+asyncio.run(main())
@@ -1,6 +1,6 @@
 import asyncio
+import contextvars
 import logging
-import re
 import sys
 import traceback
 
@@ -16,8 +16,15 @@ from discord.gateway import DiscordClientWebSocketResponse, DiscordWebSocket
 from discord.utils import parse_time
 from groq import AsyncGroq
 
-from classes.http import HTTPClient
+from classes import consumer, memo
+from classes.cache import Cache
+from classes.consumer import Consumer
+from classes.http import HTTPClient, current_route
+from classes.loader import Loader
 from classes.misc import Session, Status
+from classes.ratelimit import RateLimiter
+from classes.reactions import ReactionQueue
+from classes.recorder import Recorder
 from classes.state import State
 from utils import tools
 from utils.config import Config
@@ -25,6 +32,8 @@ from utils.prometheus import Prometheus
 
 log = logging.getLogger(__name__)
 
+current_listener = contextvars.ContextVar("listener", default=None)
+
 
 class ModMail(commands.AutoShardedBot):
     def __init__(self, command_prefix=None, **kwargs):
@@ -48,6 +57,7 @@ class ModMail(commands.AutoShardedBot):
         self.ws = None
         self.loop = asyncio.get_event_loop()
         self.http = HTTPClient(None, loop=self.loop)
+        self.reactions = ReactionQueue(loop=self.loop)
 
         self._handlers = {"ready": self._handle_ready}
         self._hooks = {}
@@ -73,6 +83,19 @@ class ModMail(commands.AutoShardedBot):
         self.ai = None
 
         self._enabled_events = [
+            "CHANNEL_CREATE",
+            "CHANNEL_DELETE",
+            "CHANNEL_UPDATE",
+            "GUILD_CREATE",
+            "GUILD_DELETE",
+            "GUILD_EMOJIS_UPDATE",
+            "GUILD_MEMBER_ADD",
+            "GUILD_MEMBER_REMOVE",
+            "GUILD_MEMBER_UPDATE",
+            "GUILD_ROLE_CREATE",
+            "GUILD_ROLE_DELETE",
+            "GUILD_ROLE_UPDATE",
+            "GUILD_UPDATE",
             "MESSAGE_CREATE",
             "MESSAGE_REACTION_ADD",
             "READY",
@@ -133,11 +156,19 @@ class ModMail(commands.AutoShardedBot):
             int(x): Session(y) for x, y in (await self._connection.get("gateway_sessions")).items()
         }
 
-    async def get_channel(self, channel_id):
-        return await self._connection.get_channel(channel_id)
+    async def get_channel(self, channel_id, roles=False):
+        return await memo.memoize(
+            ("channel", channel_id, roles),
+            lambda: self._connection.get_channel(channel_id, roles=roles),
+        )
 
     async def get_guild(self, guild_id):
-        return await self._connection._get_guild(guild_id)
+        return await memo.memoize(
+            ("guild", guild_id), lambda: self._connection._get_guild(guild_id)
+        )
+
+    async def get_guilds(self, guild_ids):
+        return await self._connection._get_guilds(guild_ids)
 
     async def get_user(self, user_id):
         return await self._connection.get_user(user_id)
@@ -151,9 +182,31 @@ class ModMail(commands.AutoShardedBot):
     async def get_all_members(self):
         pass
 
-    async def receive_message(self, msg):
+    def _schedule_event(self, coro, event_name, *args, **kwargs):
+        task = super()._schedule_event(coro, event_name, *args, **kwargs)
+        consumer.track(task)
+        return task
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        current_listener.set(coro.__qualname__)
+        start = self.loop.time()
+
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            self.prom.handler_latency.observe(
+                {"event": event_name, "listener": coro.__qualname__}, self.loop.time() - start
+            )
+
+    async def invoke(self, ctx):
+        if ctx.command is not None:
+            current_listener.set(f"{ctx.command.cog_name}.{ctx.command.qualified_name}")
+
+        await super().invoke(ctx)
+
+    async def receive_message(self, msg, payload=None):
         self.ws._dispatch("socket_raw_receive", msg)
-        msg = orjson.loads(msg)
+        msg = orjson.loads(msg) if payload is None else payload
         self.ws._dispatch("socket_response", msg)
 
         op = msg.get("op")
@@ -173,6 +226,10 @@ class ModMail(commands.AutoShardedBot):
         if event not in self._enabled_events:
             return
 
+        self.prom.events.inc({"event": event})
+        token = memo.start(prom=self.prom)
+        start = self.loop.time()
+
         try:
             await func(data, old)
         except asyncio.CancelledError:
@@ -182,6 +239,9 @@ class ModMail(commands.AutoShardedBot):
                 await self.on_error(event)
             except asyncio.CancelledError:
                 pass
+        finally:
+            self.prom.parse_latency.observe({"event": event}, self.loop.time() - start)
+            memo.reset(token)
 
     async def send_message(self, msg):
         data = orjson.dumps(msg)
@@ -199,21 +259,36 @@ class ModMail(commands.AutoShardedBot):
         if elapsed > 1:
             log.warning(f"{params.method} {params.url} took {round(elapsed, 2)} seconds")
 
-        route = str(params.url)
-        route = re.sub(r"https:\/\/[a-z\.]+\/api\/v[0-9]+", "", route)
-        route = re.sub(r"\/[%A-Z0-9]+", "/_id", route)
-        route = re.sub(r"\?.+", "", route)
-
-        if not route.startswith("/"):
+        route = current_route.get()
+        if route is None:
             return
 
+        response = params.response
+        labels = {"method": route.method, "route": route.path}
+
         self.prom.http.inc(
-            {
-                "method": params.method,
-                "route": route,
-                "status": str(params.response.status),
-            }
+            {**labels, "status": str(response.status), "listener": current_listener.get() or ""}
         )
+        self.prom.http_latency.observe(labels, elapsed)
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        if remaining is not None:
+            major = route.channel_id or route.guild_id or getattr(route, "webhook_id", None)
+            bucket = {
+                "bucket": response.headers.get("X-RateLimit-Bucket", route.path),
+                "major": str(major or ""),
+            }
+            self.prom.http_ratelimit_remaining.set(bucket, float(remaining))
+
+        if self.http.ratelimiter is not None:
+            await self.http.ratelimiter.update(route, response)
+
+        if response.status == 429:
+            if response.headers.get("X-RateLimit-Global"):
+                self.prom.http_global_ratelimited.inc(labels)
+            else:
+                scope = response.headers.get("X-RateLimit-Scope", "user")
+                self.prom.http_ratelimited.inc({**labels, "scope": scope})
 
     async def ai_generate(self, text):
         completion = await self.ai.chat.completions.create(
@@ -259,6 +334,7 @@ class ModMail(commands.AutoShardedBot):
                 port=int(self.config.RABBIT_PORT),
             )
             self._amqp_channel = await self._amqp.channel()
+            await self._amqp_channel.set_qos(prefetch_count=int(self.config.WORKER_PREFETCH or 100))
             self._amqp_queue = await self._amqp_channel.get_queue("gateway.recv")
 
         self.prom = Prometheus(self)
@@ -267,6 +343,14 @@ class ModMail(commands.AutoShardedBot):
         if self.config.GROQ_KEY is not None:
             self.ai = AsyncGroq(api_key=self.config.GROQ_KEY)
 
+        cache = None
+        if self.config.STATE_CACHE_ENABLED != "false":
+            cache = Cache(
+                size=int(self.config.STATE_CACHE_SIZE or 10000),
+                ttl=int(self.config.STATE_CACHE_TTL or 30),
+                prom=self.prom,
+            )
+
         self._connection = State(
             id=self.id,
             dispatch=self.dispatch,
@@ -276,9 +360,18 @@ class ModMail(commands.AutoShardedBot):
             loop=self.loop,
             redis=self._redis,
             shard_count=int(await self._redis.get("gateway_shards")),
+            index_ttl=int(self.config.STATE_INDEX_TTL or 300),
+            user_ttl=int(self.config.STATE_USER_TTL or 86400),
+            ticket_ttl=int(self.config.STATE_TICKET_TTL or 86400),
+            cache=cache,
+            loader=Loader(redis=self._redis, loop=self.loop, prom=self.prom),
         )
         self._connection._get_client = lambda: self
 
+        if self.config.HTTP_SHARED_RATELIMIT == "true":
+            self.http.ratelimiter = RateLimiter(state=self._connection)
+        self.loop.create_task(self._connection.watch_invalidations())
+
         self.ws = DiscordWebSocket(socket=None, loop=self.loop)
         self.ws.token = self.http.token
         self.ws._connection = self._connection
@@ -296,8 +389,20 @@ class ModMail(commands.AutoShardedBot):
                 log.error(f"Failed to load extension {extension}.", file=sys.stderr)
                 log.error(traceback.print_exc())
 
-        async with self._amqp_queue.iterator() as queue_iter:
-            async for message in queue_iter:
-                async with message.process(ignore_processed=True):
-                    await self.receive_message(message.body)
-                    await message.ack()
+        recorder = None
+        if self.config.GATEWAY_RECORD is not None:
+            recorder = Recorder(self.config.GATEWAY_RECORD.format(cluster=self.cluster))
+
+        await Consumer(
+            self,
+            queue=self._amqp_queue,
+            lanes=consumer.parse_lanes(self.config.WORKER_LANES),
+            concurrency=int(self.config.WORKER_CONCURRENCY or 32),
+            timeout=int(self.config.WORKER_HANDLER_TIMEOUT or 30),
+            ack_batch=int(self.config.WORKER_ACK_BATCH or 20),
+            dedupe_ttl=int(self.config.WORKER_DEDUPE_TTL or 300),
+            shed_depths=[
+                int(x) for x in (self.config.WORKER_SHED_DEPTHS or "1000,5000").split(",")
+            ],
+            recorder=recorder,
+        ).start()
@@ -0,0 +1,60 @@
+import logging
+import time
+
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+
+class Cache:
+    def __init__(self, *, size, ttl, prom=None):
+        self.size = size
+        self.ttl = ttl
+        self.prom = prom
+        self.generation = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        item = self._items.get(key)
+
+        if item is not None and item[0] < time.monotonic():
+            del self._items[key]
+            item = None
+
+        if item is None:
+            if self.prom:
+                self.prom.state_cache_misses.inc({})
+            return None
+
+        self._items.move_to_end(key)
+
+        if self.prom:
+            self.prom.state_cache_hits.inc({})
+
+        return item[1]
+
+    def set(self, key, value, generation=None):
+        if generation is not None and generation != self.generation:
+            return
+
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+
+        while len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+            if self.prom:
+                self.prom.state_cache_evictions.inc({})
+
+    def delete(self, *keys):
+        self.generation += 1
+
+        for key in keys:
+            self._items.pop(key, None)
+
+    def clear(self):
+        self.generation += 1
+        self._items.clear()
@@ -7,28 +7,59 @@ from discord.permissions import Permissions
 
 from classes.embed import Embed
 from classes.invite import Invite
+from classes.misc import Lazy
 
 log = logging.getLogger(__name__)
 
 
-class TextChannel(channel.TextChannel):
+def _overwrites(channel, data):
+    channel._fill_overwrites(data)
+    return channel._overwrites
+
+
+class TextChannel(Lazy, channel.TextChannel):
+    __slots__ = (
+        "_data",
+        "_state",
+        "id",
+        "_type",
+        "guild",
+        "name",
+        "category_id",
+        "topic",
+        "position",
+        "nsfw",
+        "slowmode_delay",
+        "last_message_id",
+        "_overwrites",
+    )
+
+    _fields = {
+        "name": lambda _, x: x.get("name", ""),
+        "category_id": lambda _, x: utils._get_as_snowflake(x, "parent_id"),
+        "topic": lambda _, x: x.get("topic", ""),
+        "position": lambda _, x: x.get("position", 0),
+        "nsfw": lambda _, x: x.get("nsfw", False),
+        "slowmode_delay": lambda _, x: x.get("rate_limit_per_user", 0),
+        "last_message_id": lambda _, x: utils._get_as_snowflake(x, "last_message_id"),
+        "_overwrites": _overwrites,
+    }
+
     def __init__(self, *, state, guild, data):
         self._state = state
+        self._data = data
         self.id = int(data["id"])
         self._type = data.get("type", 0)
-        self._update(guild, data)
+        self.guild = guild
 
     def _update(self, guild, data):
+        self._reset(data)
         self.guild = guild
-        self.name = data.get("name", "")
-        self.category_id = utils._get_as_snowflake(data, "parent_id")
-        self.topic = data.get("topic", "")
-        self.position = data.get("position", 0)
-        self.nsfw = data.get("nsfw", False)
-        self.slowmode_delay = data.get("rate_limit_per_user", 0)
         self._type = data.get("type", self._type)
-        self.last_message_id = utils._get_as_snowflake(data, "last_message_id")
-        self._fill_overwrites(data)
+
+    async def delete(self, *, reason=None):
+        await super().delete(reason=reason)
+        await self._state._ticket_update(self.guild.id, f"channel:{self.id}")
 
     async def create_invite(self, *, reason=None, **fields):
         data = await self._state.http.create_invite(self.id, reason=reason, **fields)
@@ -38,9 +69,9 @@ class TextChannel(channel.TextChannel):
         if self.guild.owner_id == member.id:
             return Permissions.all()
 
-        default = await self.guild.default_role()
-        base = Permissions(default.permissions.value)
         roles = await self.guild.roles()
+        default = utils.get(roles, id=self.guild.id) or await self.guild.default_role()
+        base = Permissions(default.permissions.value)
 
         for role in roles:
             if role.id in member._roles:
@@ -0,0 +1,38 @@
+import logging
+
+log = logging.getLogger(__name__)
+
+COLUMNS = {
+    "guild": "guild",
+    "prefix": "prefix",
+    "category": "category",
+    "access_roles": "accessrole",
+    "logging": "logging",
+    "welcome": "welcome",
+    "goodbye": "goodbye",
+    "logging_plus": "loggingplus",
+    "ping_roles": "pingrole",
+    "blacklist": "blacklist",
+    "anonymous": "anonymous",
+    "command_only": "commandonly",
+    "toggle": "toggle",
+    "ai_prompt": "aiprompt",
+}
+
+
+class GuildConfig:
+    __slots__ = tuple(COLUMNS)
+
+    def __init__(self, **kwargs):
+        for name in self.__slots__:
+            setattr(self, name, kwargs[name])
+
+    def __repr__(self):
+        return f"<GuildConfig guild={self.guild}>"
+
+    @classmethod
+    def from_record(cls, record):
+        return cls(**{x: record[y] for x, y in COLUMNS.items()})
+
+    def to_dict(self):
+        return {x: getattr(self, x) for x in self.__slots__}
@@ -0,0 +1,389 @@
+import asyncio
+import collections
+import contextvars
+import itertools
+import logging
+
+import aioredis
+import orjson
+
+from utils import tools
+
+log = logging.getLogger(__name__)
+
+MODES = ["normal", "shed", "overload"]
+
+LANES = {"dm": (8, 16), "guild": (4, 16), "reaction": (2, 8), "other": (1, 8)}
+
+_tasks = contextvars.ContextVar("tasks", default=None)
+
+
+def parse_lanes(value):
+    lanes = dict(LANES)
+
+    for lane in (value or "").split(","):
+        if lane.strip() == "":
+            continue
+
+        name, weight, concurrency = lane.strip().split(":")
+        if name not in lanes:
+            raise ValueError(f"Unknown worker lane {name}.")
+
+        lanes[name] = (int(weight), int(concurrency))
+
+    return lanes
+
+
+def disabled_event(body, enabled):
+    event = None
+    start = body.find(b'"t":"')
+
+    while start != -1:
+        end = body.find(b'"', start + 5)
+        if end == -1:
+            break
+
+        if body[start + 5 : end] in enabled:
+            return None
+
+        event = event or body[start + 5 : end]
+
+        if body.find(b"{", 1, start) == -1:
+            break
+
+        start = body.find(b'"t":"', end)
+
+    return event and event.decode("utf-8")
+
+
+def track(task):
+    tasks = _tasks.get()
+
+    if tasks is not None:
+        tasks.add(task)
+
+
+def idempotency_key(payload):
+    event = payload.get("t")
+    data = payload.get("d")
+
+    if event == "MESSAGE_CREATE":
+        return f"event_seen:{data['id']}"
+
+    return None
+
+
+class Acker:
+    PENDING, COMPLETED, ACKED = range(3)
+
+    def __init__(self, *, loop, batch, delay):
+        self.loop = loop
+        self.batch = batch
+        self.delay = delay
+        self._pending = collections.deque()
+        self._last = None
+        self._count = 0
+        self._timer = None
+
+    def add(self, message):
+        entry = [message, self.PENDING]
+        self._pending.append(entry)
+        return entry
+
+    def complete(self, entry):
+        entry[1] = self.COMPLETED
+        self._count += 1
+
+        while self._pending and self._pending[0][1] != self.PENDING:
+            message, state = self._pending.popleft()
+            if state == self.COMPLETED:
+                self._last = message
+
+        if self._count >= self.batch:
+            self.flush()
+        elif self._timer is None:
+            self._timer = self.loop.call_later(self.delay, self.flush)
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        if self._last is not None:
+            self.loop.create_task(self._ack(self._last, True))
+            self._last = None
+
+        for entry in self._pending:
+            if entry[1] == self.COMPLETED:
+                entry[1] = self.ACKED
+                self.loop.create_task(self._ack(entry[0], False))
+
+        self._count = 0
+
+    async def _ack(self, message, multiple):
+        try:
+            await message.ack(multiple=multiple)
+        except Exception:
+            log.warning("Failed to acknowledge gateway messages.")
+
+
+class Lane:
+    def __init__(self, name, *, weight, concurrency):
+        self.name = name
+        self.weight = weight
+        self.shards = [asyncio.Queue() for _ in range(concurrency)]
+        self.waiters = collections.deque()
+        self.inflight = 0
+        self.current = 0
+        self._next_shard = itertools.cycle(range(concurrency))
+
+    def put(self, key, item):
+        if key is None:
+            index = next(self._next_shard)
+        else:
+            index = int(key) % len(self.shards)
+
+        self.inflight += 1
+        self.shards[index].put_nowait(item)
+
+
+class Consumer:
+    def __init__(
+        self,
+        bot,
+        *,
+        queue,
+        lanes,
+        concurrency,
+        timeout,
+        ack_batch,
+        dedupe_ttl,
+        shed_depths,
+        recorder=None,
+    ):
+        self.bot = bot
+        self.queue = queue
+        self.timeout = timeout
+        self.dedupe_ttl = dedupe_ttl
+        self.shed_depths = shed_depths
+        self.recorder = recorder
+        self.mode = 0
+        self.acker = Acker(loop=bot.loop, batch=ack_batch, delay=0.1)
+        self.lanes = {
+            name: Lane(name, weight=weight, concurrency=lane_concurrency)
+            for name, (weight, lane_concurrency) in lanes.items()
+        }
+        self._slots = concurrency
+        self._enabled = {x.encode("utf-8") for x in bot._enabled_events}
+
+    async def start(self):
+        for lane in self.lanes.values():
+            for shard in lane.shards:
+                self.bot.loop.create_task(self._worker(lane, shard))
+
+        self.bot.loop.create_task(self._monitor())
+
+        async with self.queue.iterator() as queue_iter:
+            async for message in queue_iter:
+                self.submit(message)
+
+    def submit(self, message):
+        entry = self.acker.add(message)
+
+        if self.recorder is not None:
+            self.recorder.write(message.body)
+
+        event = disabled_event(message.body, self._enabled)
+        if event is not None:
+            self.bot.prom.events_dropped.inc({"event": event})
+            self.acker.complete(entry)
+            return
+
+        try:
+            payload = orjson.loads(message.body)
+        except orjson.JSONDecodeError:
+            log.warning("Dropped an undecodable gateway payload.")
+            self.acker.complete(entry)
+            return
+
+        data = payload.get("d")
+        if not isinstance(data, dict):
+            data = {}
+
+        lane = self.lanes[self._lane(payload.get("t"), data)]
+        lane.put(
+            data.get("channel_id") or data.get("guild_id"),
+            (entry, payload, self.bot.loop.time()),
+        )
+        self.bot.prom.events_inflight.set({"lane": lane.name}, lane.inflight)
+
+    def _lane(self, event, data):
+        if event == "MESSAGE_CREATE":
+            return "guild" if data.get("guild_id") else "dm"
+
+        if event == "MESSAGE_REACTION_ADD":
+            return "reaction"
+
+        return "other"
+
+    async def _acquire(self, lane):
+        if self._slots > 0 and not any(x.waiters for x in self.lanes.values()):
+            self._slots -= 1
+            return
+
+        future = self.bot.loop.create_future()
+        lane.waiters.append(future)
+        await future
+
+    def _release(self):
+        lanes = [x for x in self.lanes.values() if x.waiters]
+
+        if not lanes:
+            self._slots += 1
+            return
+
+        for lane in lanes:
+            lane.current += lane.weight
+
+        lane = max(lanes, key=lambda x: x.current)
+        lane.current -= sum(x.weight for x in lanes)
+        lane.waiters.popleft().set_result(None)
+
+    async def _worker(self, lane, shard):
+        while True:
+            entry, payload, received = await shard.get()
+            await self._acquire(lane)
+
+            self.bot.prom.queue_latency.observe(
+                {"event": payload.get("t")}, self.bot.loop.time() - received
+            )
+
+            try:
+                await self._handle(entry[0], payload, received)
+            except Exception:
+                log.exception("Failed to handle a gateway payload.")
+            finally:
+                self._release()
+                self.acker.complete(entry)
+                lane.inflight -= 1
+                self.bot.prom.events_inflight.set({"lane": lane.name}, lane.inflight)
+
+    async def _handle(self, message, payload, received):
+        key = idempotency_key(payload)
+
+        if key is not None and not await self._claim(message, key):
+            self.bot.prom.events_duplicate.inc({"event": payload["t"]})
+            return
+
+        try:
+            await self._process(message, payload, received)
+        except BaseException:
+            if key is not None:
+                await self.bot.state.redis.delete(key)
+            raise
+
+        if key is not None:
+            await self.bot.state.redis.set(key, "done", expire=self.dedupe_ttl)
+
+    async def _process(self, message, payload, received):
+        if await self._shed(payload):
+            self.bot.prom.events_shed.inc({"event": payload["t"], "mode": MODES[self.mode]})
+            return
+
+        tasks = set()
+        token = _tasks.set(tasks)
+
+        try:
+            await self.bot.receive_message(message.body, payload)
+            await self._wait(tasks)
+
+            self.bot.prom.event_latency.observe(
+                {"event": payload["t"]}, self.bot.loop.time() - received
+            )
+        finally:
+            _tasks.reset(token)
+
+    async def _claim(self, message, key):
+        redis = self.bot.state.redis
+        expire = int(self.timeout) + 10
+
+        if await redis.set(key, "processing", expire=expire, exist=aioredis.Redis.SET_IF_NOT_EXIST):
+            return True
+
+        if message.redelivered and await redis.get(key) == b"processing":
+            await redis.set(key, "processing", expire=expire)
+            return True
+
+        return False
+
+    async def _shed(self, payload):
+        if self.mode == 0:
+            return False
+
+        event = payload["t"]
+        data = payload["d"]
+
+        if event == "MESSAGE_REACTION_ADD":
+            menu = f"reaction_menu:{data['channel_id']}:{data['message_id']}"
+            return not await self.bot.state.redis.exists(menu)
+
+        if self.mode < 2 or event != "MESSAGE_CREATE" or not data.get("guild_id"):
+            return False
+
+        if data["author"].get("bot"):
+            return True
+
+        content = data.get("content", "")
+        if content.startswith((f"<@{self.bot.id}>", f"<@!{self.bot.id}>")):
+            return False
+
+        prefix = await self.bot.state.get(f"prefix:{data['guild_id']}", False)
+        if prefix is None or content.startswith(prefix or self.bot.config.DEFAULT_PREFIX):
+            return False
+
+        channel = await self.bot.get_channel(int(data["channel_id"]))
+        return not tools.is_modmail_channel(channel)
+
+    def _update_mode(self, depth):
+        mode = self.mode
+
+        while mode < len(self.shed_depths) and depth >= self.shed_depths[mode]:
+            mode += 1
+
+        while mode > 0 and depth < self.shed_depths[mode - 1] // 2:
+            mode -= 1
+
+        if mode != self.mode:
+            log.warning(f"Switching to {MODES[mode]} mode with {depth} queued events.")
+            self.mode = mode
+
+        self.bot.prom.shed_mode.set({}, mode)
+
+    async def _wait(self, tasks):
+        deadline = self.bot.loop.time() + self.timeout
+
+        while tasks:
+            timeout = deadline - self.bot.loop.time()
+            if timeout <= 0:
+                log.warning("Handlers took too long, acknowledging before they finish.")
+                return
+
+            pending = set(tasks)
+            tasks.clear()
+
+            _, pending = await asyncio.wait(pending, timeout=timeout)
+            tasks.update(pending)
+
+    async def _monitor(self):
+        while True:
+            try:
+                result = await self.queue.declare()
+                self.bot.prom.queue_depth.set({}, result.message_count)
+                self._update_mode(result.message_count)
+            except Exception:
+                log.warning("Failed to read the gateway queue depth.")
+
+            if self.recorder is not None:
+                self.recorder.flush()
+
+            await asyncio.sleep(5)
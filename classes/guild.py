@@ -14,17 +14,95 @@ from discord.enums import (
 from discord.member import VoiceState
 from discord.role import Role
 
+from classes import memo
 from classes.channel import TextChannel, _channel_factory
 from classes.invite import Invite
 from classes.member import Member
+from classes.misc import Lazy
 
 log = logging.getLogger(__name__)
 
 
-class Guild(guild.Guild):
-    def __init__(self, *, data, state):
+class Guild(Lazy, guild.Guild):
+    __slots__ = (
+        "_data",
+        "_role_data",
+        "_state",
+        "id",
+        "_member_count",
+        "name",
+        "region",
+        "verification_level",
+        "default_notifications",
+        "explicit_content_filter",
+        "afk_timeout",
+        "icon",
+        "banner",
+        "unavailable",
+        "mfa_level",
+        "features",
+        "splash",
+        "_system_channel_id",
+        "description",
+        "max_presences",
+        "max_members",
+        "max_video_channel_users",
+        "premium_tier",
+        "premium_subscription_count",
+        "_system_channel_flags",
+        "preferred_locale",
+        "discovery_splash",
+        "_rules_channel_id",
+        "_public_updates_channel_id",
+        "_large",
+        "owner_id",
+        "_afk_channel_id",
+    )
+
+    _fields = {
+        "_member_count": lambda _, x: x.get("member_count") or 0,
+        "name": lambda _, x: x.get("name"),
+        "region": lambda _, x: try_enum(VoiceRegion, x.get("region")),
+        "verification_level": lambda _, x: try_enum(VerificationLevel, x.get("verification_level")),
+        "default_notifications": lambda _, x: try_enum(
+            NotificationLevel, x.get("default_message_notifications")
+        ),
+        "explicit_content_filter": lambda _, x: try_enum(
+            ContentFilter, x.get("explicit_content_filter", 0)
+        ),
+        "afk_timeout": lambda _, x: x.get("afk_timeout"),
+        "icon": lambda _, x: x.get("icon"),
+        "banner": lambda _, x: x.get("banner"),
+        "unavailable": lambda _, x: x.get("unavailable", False),
+        "mfa_level": lambda _, x: x.get("mfa_level"),
+        "features": lambda _, x: x.get("features", []),
+        "splash": lambda _, x: x.get("splash"),
+        "_system_channel_id": lambda _, x: utils._get_as_snowflake(x, "system_channel_id"),
+        "description": lambda _, x: x.get("description"),
+        "max_presences": lambda _, x: x.get("max_presences"),
+        "max_members": lambda _, x: x.get("max_members"),
+        "max_video_channel_users": lambda _, x: x.get("max_video_channel_users"),
+        "premium_tier": lambda _, x: x.get("premium_tier", 0),
+        "premium_subscription_count": lambda _, x: x.get("premium_subscription_count") or 0,
+        "_system_channel_flags": lambda _, x: x.get("system_channel_flags", 0),
+        "preferred_locale": lambda _, x: x.get("preferred_locale"),
+        "discovery_splash": lambda _, x: x.get("discovery_splash"),
+        "_rules_channel_id": lambda _, x: utils._get_as_snowflake(x, "rules_channel_id"),
+        "_public_updates_channel_id": lambda _, x: utils._get_as_snowflake(
+            x, "public_updates_channel_id"
+        ),
+        "_large": lambda _, x: (
+            None if x.get("member_count") is None else x["member_count"] >= 250
+        ),
+        "owner_id": lambda _, x: utils._get_as_snowflake(x, "owner_id"),
+        "_afk_channel_id": lambda _, x: utils._get_as_snowflake(x, "afk_channel_id"),
+    }
+
+    def __init__(self, *, data, state, roles=None):
         self._state = state
-        self._from_data(data)
+        self._data = data
+        self._role_data = roles
+        self.id = int(data["id"])
 
     def _add_channel(self, channel):
         return
@@ -48,46 +126,8 @@ class Guild(guild.Guild):
         return
 
     def _from_data(self, guild):
-        member_count = guild.get("member_count", None)
-        if member_count is not None:
-            self._member_count = member_count
-        else:
-            self._member_count = 0
-
-        self.name = guild.get("name")
-        self.region = try_enum(VoiceRegion, guild.get("region"))
-        self.verification_level = try_enum(VerificationLevel, guild.get("verification_level"))
-        self.default_notifications = try_enum(
-            NotificationLevel, guild.get("default_message_notifications")
-        )
-        self.explicit_content_filter = try_enum(
-            ContentFilter, guild.get("explicit_content_filter", 0)
-        )
-        self.afk_timeout = guild.get("afk_timeout")
-        self.icon = guild.get("icon")
-        self.banner = guild.get("banner")
-        self.unavailable = guild.get("unavailable", False)
+        self._reset(guild)
         self.id = int(guild["id"])
-        self.mfa_level = guild.get("mfa_level")
-        self.features = guild.get("features", [])
-        self.splash = guild.get("splash")
-        self._system_channel_id = utils._get_as_snowflake(guild, "system_channel_id")
-        self.description = guild.get("description")
-        self.max_presences = guild.get("max_presences")
-        self.max_members = guild.get("max_members")
-        self.max_video_channel_users = guild.get("max_video_channel_users")
-        self.premium_tier = guild.get("premium_tier", 0)
-        self.premium_subscription_count = guild.get("premium_subscription_count") or 0
-        self._system_channel_flags = guild.get("system_channel_flags", 0)
-        self.preferred_locale = guild.get("preferred_locale")
-        self.discovery_splash = guild.get("discovery_splash")
-        self._rules_channel_id = utils._get_as_snowflake(guild, "rules_channel_id")
-        self._public_updates_channel_id = utils._get_as_snowflake(
-            guild, "public_updates_channel_id"
-        )
-        self._large = None if member_count is None else self._member_count >= 250
-        self.owner_id = utils._get_as_snowflake(guild, "owner_id")
-        self._afk_channel_id = utils._get_as_snowflake(guild, "afk_channel_id")
 
     async def create_text_channel(
         self, name, *, overwrites=None, category=None, reason=None, **options
@@ -95,6 +135,11 @@ class Guild(guild.Guild):
         data = await self._create_channel(
             name, overwrites, ChannelType.text, category, reason=reason, **options
         )
+
+        user_id = self._state._ticket_user(data)
+        if user_id:
+            await self._state._ticket_update(self.id, f"channel:{data['id']}", user_id)
+
         return TextChannel(state=self._state, guild=self, data=data)
 
     async def create_category(self, name, *, overwrites=None, reason=None, position=None):
@@ -109,7 +154,7 @@ class Guild(guild.Guild):
 
     async def _channels(self):
         channels = []
-        for channel in await self._state._members_get_all("guild", key_id=self.id, name="channel"):
+        for channel in await self._state._index_get_all("channel", self.id):
             factory, _ = _channel_factory(channel["type"])
             channels.append(factory(guild=self, state=self._state, data=channel))
 
@@ -118,26 +163,24 @@ class Guild(guild.Guild):
     async def _emojis(self):
         return [
             Emoji(guild=self, state=self._state, data=x)
-            for x in await self._state._members_get_all("guild", key_id=self.id, name="emoji")
+            for x in await self._state._index_get_all("emoji", self.id)
         ]
 
     async def _members(self):
         return [
             Member(guild=self, state=self._state, data=x)
-            for x in await self._state._members_get_all("guild", key_id=self.id, name="member")
+            for x in await self._state._index_get_all("member", self.id)
         ]
 
     async def _roles(self):
-        return sorted(
-            [
-                Role(guild=self, state=self._state, data=x)
-                for x in await self._state._members_get_all("guild", key_id=self.id, name="role")
-            ]
-        )
+        if self._role_data is None:
+            self._role_data = await self._state._index_get_all("role", self.id)
+
+        return sorted([Role(guild=self, state=self._state, data=x) for x in self._role_data])
 
     async def _voice_states(self):
         voices = []
-        for voice in await self._state._members_get_all("guild", key_id=self.id, name="voice"):
+        for voice in await self._state._index_get_all("voice", self.id):
             if voice["channel_id"]:
                 channel = await self.get_channel(int(voice["channel_id"]))
                 if channel:
@@ -164,6 +207,16 @@ class Guild(guild.Guild):
         channels.sort(key=lambda x: (x.position, x.id))
         return channels
 
+    async def ticket_channel(self, user_id):
+        channels = await self._state._tickets(self.id, str(user_id))
+        return TextChannel(guild=self, state=self._state, data=channels[0]) if channels else None
+
+    async def ticket_channels(self):
+        return [
+            TextChannel(guild=self, state=self._state, data=x)
+            for x in await self._state._tickets(self.id)
+        ]
+
     async def get_channel(self, channel_id):
         channel = await self._state.get(f"channel:{channel_id}")
 
@@ -173,6 +226,20 @@ class Guild(guild.Guild):
         factory, _ = _channel_factory(channel["type"])
         return factory(guild=self, state=self._state, data=channel)
 
+    async def get_channels(self, *channel_ids):
+        channels = []
+        for channel in await self._state._mget([f"channel:{x}" for x in channel_ids]):
+            channel = self._state._loads(channel, True)
+
+            if not channel:
+                channels.append(None)
+                continue
+
+            factory, _ = _channel_factory(channel["type"])
+            channels.append(factory(guild=self, state=self._state, data=channel))
+
+        return channels
+
     async def afk_channel(self):
         channel_id = self._afk_channel_id
         return channel_id and await self.get_channel(channel_id)
@@ -204,6 +271,9 @@ class Guild(guild.Guild):
         return None
 
     async def me(self):
+        return await memo.memoize(("me", self.id), self._me)
+
+    async def _me(self):
         member = await self.get_member(self._state.id)
 
         if member:
@@ -215,7 +285,10 @@ class Guild(guild.Guild):
         return await self._roles()
 
     async def get_role(self, role_id):
-        role = await self._state.get(f"role:{self.id}:{role_id}")
+        if self._role_data is not None:
+            role = utils.find(lambda x: int(x["id"]) == role_id, self._role_data)
+        else:
+            role = await self._state.get(f"role:{self.id}:{role_id}")
 
         if role:
             return Role(guild=self, state=self._state, data=role)
@@ -1,3 +1,4 @@
+import contextvars
 import logging
 
 from discord import http
@@ -5,8 +6,23 @@ from discord.http import Route
 
 log = logging.getLogger(__name__)
 
+current_route = contextvars.ContextVar("route", default=None)
+
 
 class HTTPClient(http.HTTPClient):
+    ratelimiter = None
+
+    async def request(self, route, *args, **kwargs):
+        if self.ratelimiter is not None:
+            await self.ratelimiter.acquire(route)
+
+        token = current_route.set(route)
+
+        try:
+            return await super().request(route, *args, **kwargs)
+        finally:
+            current_route.reset(token)
+
     def request_guild_members(self, guild_id, query, limit=1):
         return self.request(
             Route(
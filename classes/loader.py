@@ -0,0 +1,62 @@
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+
+class Loader:
+    def __init__(self, *, redis, loop, prom=None):
+        self.redis = redis
+        self.loop = loop
+        self.prom = prom
+        self._pending = {}
+        self._inflight = {}
+        self._batch = []
+        self._scheduled = False
+
+    async def load(self, key):
+        future = self._pending.get(key) or self._inflight.get(key)
+
+        if future is None:
+            future = self._pending[key] = self.loop.create_future()
+            self._batch.append((key, future))
+
+            if not self._scheduled:
+                self._scheduled = True
+                self.loop.call_soon(self._dispatch)
+
+        return await asyncio.shield(future)
+
+    def forget(self, *keys):
+        for key in keys:
+            self._pending.pop(key, None)
+            self._inflight.pop(key, None)
+
+    def _dispatch(self):
+        self._scheduled = False
+        batch, self._batch = self._batch, []
+
+        for key, future in batch:
+            if self._pending.get(key) is future:
+                self._inflight[key] = self._pending.pop(key)
+
+        self.loop.create_task(self._fetch(batch))
+
+    async def _fetch(self, batch):
+        if self.prom:
+            self.prom.state_batch_size.observe({}, len(batch))
+
+        try:
+            values = await self.redis.mget(*[key for key, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        else:
+            for (_, future), value in zip(batch, values):
+                if not future.done():
+                    future.set_result(value)
+        finally:
+            for key, future in batch:
+                if self._inflight.get(key) is future:
+                    del self._inflight[key]
@@ -5,18 +5,40 @@ from discord import Permissions, Status, member, utils
 from discord.activity import create_activity
 from discord.enums import try_enum
 
+from classes.misc import Lazy
+
 log = logging.getLogger(__name__)
 
 
-class Member(member.Member):
+def _roles(member, data):
+    member._update_roles(data)
+    return member._roles
+
+
+class Member(Lazy, member.Member):
+    __slots__ = (
+        "_data",
+        "_state",
+        "_user",
+        "guild",
+        "joined_at",
+        "premium_since",
+        "_roles",
+        "nick",
+    )
+
+    _fields = {
+        "joined_at": lambda _, x: utils.parse_time(x.get("joined_at")),
+        "premium_since": lambda _, x: utils.parse_time(x.get("premium_since")),
+        "_roles": _roles,
+        "nick": lambda _, x: x.get("nick", None),
+    }
+
     def __init__(self, *, data, guild, state):
         self._state = state
+        self._data = data
         self._user = state.store_user(data["user"])
         self.guild = guild
-        self.joined_at = utils.parse_time(data.get("joined_at"))
-        self.premium_since = utils.parse_time(data.get("premium_since"))
-        self._update_roles(data)
-        self.nick = data.get("nick", None)
 
     async def guild_permissions(self):
         if self.guild.owner_id == self.id:
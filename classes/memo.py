@@ -0,0 +1,56 @@
+import asyncio
+import contextvars
+import logging
+
+log = logging.getLogger(__name__)
+
+_memo = contextvars.ContextVar("memo", default=None)
+
+
+class Memo:
+    def __init__(self, *, prom=None):
+        self.prom = prom
+        self._items = {}
+
+    async def get(self, key, func):
+        future = self._items.get(key)
+
+        if future is None:
+            future = self._items[key] = asyncio.ensure_future(func())
+
+            if self.prom:
+                self.prom.event_fetches.inc({"kind": key[0]})
+        elif self.prom:
+            self.prom.event_fetches_saved.inc({"kind": key[0]})
+
+        return await asyncio.shield(future)
+
+    def forget(self, key):
+        self._items.pop(key, None)
+
+
+def start(*, prom=None):
+    return _memo.set(Memo(prom=prom))
+
+
+def reset(token):
+    _memo.reset(token)
+
+
+async def memoize(key, func):
+    memo = _memo.get()
+
+    if memo is None:
+        return await func()
+
+    return await memo.get(key, func)
+
+
+def forget(*keys):
+    memo = _memo.get()
+
+    if memo is None:
+        return
+
+    for key in keys:
+        memo.forget(key)
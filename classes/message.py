@@ -1,3 +1,4 @@
+import asyncio
 import copy
 import logging
 
@@ -75,13 +76,13 @@ class Message(message.Message):
         return
 
     async def reactions(self):
-        reactions = []
+        data = self._data.get("reactions", [])
+        guild_id = self.guild.id if self.guild else None
+        emojis = await asyncio.gather(
+            *[self._state.get_reaction_emoji(x["emoji"], guild_id) for x in data]
+        )
 
-        for reaction in self._data.get("reactions", []):
-            emoji = await self._state.get_reaction_emoji(reaction["emoji"])
-            reactions.append(Reaction(message=self, data=reaction, emoji=emoji))
-
-        return reactions
+        return [Reaction(message=self, data=x, emoji=y) for x, y in zip(data, emojis)]
 
     async def mentions(self):
         try:
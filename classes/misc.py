@@ -5,6 +5,45 @@ from discord.utils import parse_time
 log = logging.getLogger(__name__)
 
 
+class Lazy:
+    __slots__ = ()
+
+    _fields = {}
+
+    def __getattr__(self, name):
+        try:
+            field = self._fields[name]
+        except KeyError:
+            raise AttributeError(
+                f"'{type(self).__name__}' object has no attribute '{name}'"
+            ) from None
+
+        value = field(self, self._data)
+        setattr(self, name, value)
+        return value
+
+    def __copy__(self):
+        cls = type(self)
+        result = cls.__new__(cls)
+
+        for name in cls.__slots__:
+            try:
+                setattr(result, name, object.__getattribute__(self, name))
+            except AttributeError:
+                pass
+
+        return result
+
+    def _reset(self, data):
+        for name in self._fields:
+            try:
+                delattr(self, name)
+            except AttributeError:
+                pass
+
+        self._data = data
+
+
 class Session:
     def __init__(self, data):
         self._data = data
@@ -0,0 +1,100 @@
+import asyncio
+import logging
+
+log = logging.getLogger(__name__)
+
+PROBE_TIMEOUT = 5000
+PROBE_POLL = 50
+
+ACQUIRE_SCRIPT = """
+local time = redis.call("TIME")
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+
+local wait = redis.call("PTTL", KEYS[2])
+if wait > 0 then
+    return wait
+end
+
+local bucket = redis.call("HMGET", KEYS[1], "remaining", "reset")
+local remaining = tonumber(bucket[1])
+local reset = tonumber(bucket[2])
+
+if remaining == nil or reset == nil or reset <= now then
+    if redis.call("SET", KEYS[3], 1, "NX", "PX", ARGV[1]) then
+        return 0
+    end
+
+    return math.max(math.min(redis.call("PTTL", KEYS[3]), tonumber(ARGV[2])), 1)
+end
+
+if remaining > 0 then
+    redis.call("HINCRBY", KEYS[1], "remaining", -1)
+    return 0
+end
+
+return reset - now
+"""
+
+UPDATE_SCRIPT = """
+local time = redis.call("TIME")
+local now = time[1] * 1000 + math.floor(time[2] / 1000)
+
+local remaining = tonumber(ARGV[1])
+local reset = now + math.ceil(tonumber(ARGV[2]) * 1000)
+
+local old = tonumber(redis.call("HGET", KEYS[1], "reset"))
+if old ~= nil and old > now then
+    remaining = math.min(remaining, tonumber(redis.call("HGET", KEYS[1], "remaining")))
+    reset = math.max(reset, old)
+end
+
+redis.call("HSET", KEYS[1], "remaining", remaining, "reset", reset)
+redis.call("PEXPIREAT", KEYS[1], reset + 1000)
+redis.call("DEL", KEYS[2])
+"""
+
+
+class RateLimiter:
+    def __init__(self, *, state):
+        self.state = state
+
+    async def acquire(self, route):
+        while True:
+            wait = await self.state._script(
+                ACQUIRE_SCRIPT,
+                keys=[
+                    f"ratelimit:{route.bucket}",
+                    "ratelimit:global",
+                    f"ratelimit_probe:{route.bucket}",
+                ],
+                args=[PROBE_TIMEOUT, PROBE_POLL],
+            )
+
+            if wait <= 0:
+                return
+
+            log.debug(f"Waiting {wait}ms for rate limit bucket {route.bucket}.")
+            await asyncio.sleep(wait / 1000)
+
+    async def update(self, route, response):
+        keys = [f"ratelimit:{route.bucket}", f"ratelimit_probe:{route.bucket}"]
+
+        if response.status == 429:
+            retry_after = float(response.headers.get("Retry-After", 1))
+
+            if response.headers.get("X-RateLimit-Global"):
+                await self.state.redis.set("ratelimit:global", 1, pexpire=int(retry_after * 1000))
+                await self.state.redis.delete(keys[1])
+                return
+
+            await self.state._script(UPDATE_SCRIPT, keys=keys, args=[0, retry_after])
+            return
+
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        reset_after = response.headers.get("X-RateLimit-Reset-After")
+
+        if remaining is None or reset_after is None:
+            await self.state.redis.delete(keys[1])
+            return
+
+        await self.state._script(UPDATE_SCRIPT, keys=keys, args=[remaining, reset_after])
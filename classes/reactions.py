@@ -0,0 +1,46 @@
+import collections
+import logging
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class ReactionQueue:
+    def __init__(self, *, loop):
+        self.loop = loop
+        self._queues = {}
+        self._workers = {}
+
+    def add(self, message, *emojis):
+        self._put(message, [(message.add_reaction, (x,)) for x in emojis])
+
+    def remove(self, message, member, *emojis):
+        self._put(message, [(message.remove_reaction, (x, member)) for x in emojis])
+
+    def cancel(self, message):
+        queue = self._queues.get(message.channel.id)
+        if not queue:
+            return
+
+        self._queues[message.channel.id] = collections.deque(x for x in queue if x[0] != message.id)
+
+    def _put(self, message, operations):
+        queue = self._queues.setdefault(message.channel.id, collections.deque())
+        queue.extend((message.id, func, args) for func, args in operations)
+
+        if message.channel.id not in self._workers:
+            self._workers[message.channel.id] = self.loop.create_task(self._run(message.channel.id))
+
+    async def _run(self, channel_id):
+        try:
+            while self._queues.get(channel_id):
+                _, func, args = self._queues[channel_id].popleft()
+
+                try:
+                    await func(*args)
+                except discord.HTTPException:
+                    pass
+        finally:
+            del self._workers[channel_id]
+            self._queues.pop(channel_id, None)
@@ -0,0 +1,38 @@
+import logging
+import struct
+import time
+
+log = logging.getLogger(__name__)
+
+HEADER = struct.Struct("<dI")
+
+
+class Recorder:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "ab")
+
+    def write(self, body):
+        self._file.write(HEADER.pack(time.time(), len(body)))
+        self._file.write(body)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def read(path):
+    with open(path, "rb") as file:
+        while True:
+            header = file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                return
+
+            timestamp, length = HEADER.unpack(header)
+            body = file.read(length)
+            if len(body) < length:
+                return
+
+            yield timestamp, body
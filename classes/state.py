@@ -1,9 +1,13 @@
 import asyncio
 import copy
 import datetime
+import hashlib
 import inspect
 import logging
+import os
+import re
 
+import aioredis
 import orjson
 
 from discord import utils
@@ -31,6 +35,189 @@ from classes.message import Message
 
 log = logging.getLogger(__name__)
 
+INDEX_GET_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+return redis.call("SMEMBERS", KEYS[1])
+"""
+
+INDEX_UPDATE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+if ARGV[1] == "add" then
+    return redis.call("SADD", KEYS[1], ARGV[2])
+end
+return redis.call("SREM", KEYS[1], ARGV[2])
+"""
+
+LOOKUP_GET_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+local current = redis.call("HGET", KEYS[1], ARGV[1])
+if not current then
+    return {}
+end
+local keys = {}
+local result = {}
+local pruned = false
+for key in string.gmatch(current, "[^,]+") do
+    local value = #result == 0 and redis.call("GET", key)
+    if #result > 0 or value then
+        keys[#keys + 1] = key
+        if value then
+            result = {key, value}
+        end
+    else
+        pruned = true
+    end
+end
+if #keys == 0 then
+    redis.call("HDEL", KEYS[1], ARGV[1])
+elseif pruned then
+    redis.call("HSET", KEYS[1], ARGV[1], table.concat(keys, ","))
+end
+return result
+"""
+
+LOOKUP_UPDATE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+local keys = {}
+for key in string.gmatch(redis.call("HGET", KEYS[1], ARGV[2]) or "", "[^,]+") do
+    if key ~= ARGV[3] then
+        keys[#keys + 1] = key
+    end
+end
+if ARGV[1] == "add" then
+    keys[#keys + 1] = ARGV[3]
+end
+if #keys == 0 then
+    return redis.call("HDEL", KEYS[1], ARGV[2])
+end
+return redis.call("HSET", KEYS[1], ARGV[2], table.concat(keys, ","))
+"""
+
+CHANNEL_GET_SCRIPT = """
+local channel = redis.call("GET", KEYS[1])
+if not channel then
+    return {}
+end
+local guild_id = cjson.decode(channel)["guild_id"]
+if type(guild_id) ~= "string" then
+    return {channel}
+end
+local guild = redis.call("GET", "guild:" .. guild_id)
+if not guild then
+    return {channel}
+end
+local result = {channel, guild}
+if ARGV[1] == "1" then
+    local index = "role_index:" .. guild_id
+    if redis.call("EXISTS", index) == 0 then
+        result[#result + 1] = 0
+        return result
+    end
+    for _, key in ipairs(redis.call("SMEMBERS", index)) do
+        local role = key ~= "" and redis.call("GET", key)
+        if role then
+            result[#result + 1] = key
+            result[#result + 1] = role
+        end
+    end
+end
+return result
+"""
+
+TICKET_REMOVE = """
+local function remove(index, key)
+    local user = redis.call("HGET", index, key)
+    if not user then
+        return
+    end
+    redis.call("HDEL", index, key)
+    local field = "user:" .. user
+    local keys = {}
+    for item in string.gmatch(redis.call("HGET", index, field) or "", "[^,]+") do
+        if item ~= key then
+            keys[#keys + 1] = item
+        end
+    end
+    if #keys == 0 then
+        redis.call("HDEL", index, field)
+    else
+        redis.call("HSET", index, field, table.concat(keys, ","))
+    end
+end
+"""
+
+TICKET_GET_SCRIPT = (
+    TICKET_REMOVE
+    + """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+local keys = {}
+if ARGV[1] == "" then
+    local fields = redis.call("HGETALL", KEYS[1])
+    for i = 1, #fields, 2 do
+        if string.sub(fields[i], 1, 8) == "channel:" then
+            keys[#keys + 1] = fields[i]
+        end
+    end
+else
+    for key in string.gmatch(redis.call("HGET", KEYS[1], "user:" .. ARGV[1]) or "", "[^,]+") do
+        keys[#keys + 1] = key
+    end
+end
+local result = {}
+for _, key in ipairs(keys) do
+    local channel = redis.call("GET", key)
+    if channel then
+        result[#result + 1] = key
+        result[#result + 1] = channel
+    else
+        remove(KEYS[1], key)
+    end
+end
+return result
+"""
+)
+
+TICKET_UPDATE_SCRIPT = (
+    TICKET_REMOVE
+    + """
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+remove(KEYS[1], ARGV[1])
+if ARGV[2] ~= "" then
+    local field = "user:" .. ARGV[2]
+    local current = redis.call("HGET", KEYS[1], field)
+    redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+    redis.call("HSET", KEYS[1], field, current and current .. "," .. ARGV[1] or ARGV[1])
+end
+return 1
+"""
+)
+
+TICKET_TOPIC = re.compile(r"^ModMail Channel (\d+) \d+")
+
+INDEX_NAMES = ["channel", "emoji", "member", "role", "ticket", "voice"]
+
+CACHE_PREFIXES = ("guild:", "channel:", "role:")
+
+LOOKUP_PATTERNS = {
+    "emoji": re.compile(r"^emoji:\d+:(\d+)$"),
+    "member": re.compile(r"^member:\d+:(\d+)$"),
+    "message": re.compile(r"^message:\d+:(\d+)$"),
+}
+
+BUILD_CHUNK = 1000
+
 
 class State:
     def __init__(
@@ -48,6 +235,13 @@ class State:
         self._ready_task = None
         self._ready_state = None
         self._ready_timeout = options.get("guild_ready_timeout", 2.0)
+        self._index_ttl = options.get("index_ttl", 300)
+        self._user_ttl = options.get("user_ttl", 86400)
+        self._ticket_ttl = options.get("ticket_ttl", 86400)
+        self._scripts = {}
+        self._builds = {}
+        self._cache = options.get("cache")
+        self._loader = options.get("loader")
 
         self._voice_clients = {}
         self._private_channels_by_user = {}
@@ -76,17 +270,102 @@ class State:
             return value
         return orjson.dumps(value).decode("utf-8")
 
-    async def delete(self, key):
-        return await self.redis.delete(key)
+    def _cacheable(self, key):
+        return self._cache is not None and key.startswith(CACHE_PREFIXES)
+
+    async def _load(self, key):
+        if self._loader is None:
+            return await self.redis.get(key)
+
+        return await self._loader.load(key)
+
+    async def _get(self, key):
+        if not self._cacheable(key):
+            return await self._load(key)
+
+        value = self._cache.get(key)
+        if value is None:
+            generation = self._cache.generation
+            value = await self._load(key)
+
+            if value is not None:
+                self._cache.set(key, value, generation)
+
+        return value
+
+    async def _mget(self, keys):
+        if len(keys) == 0:
+            return []
+
+        if self._cache is None:
+            return await self.redis.mget(*keys)
+
+        values = [self._cache.get(x) if self._cacheable(x) else None for x in keys]
+        missing = [index for index, value in enumerate(values) if value is None]
+
+        if missing:
+            generation = self._cache.generation
+            for index, value in zip(missing, await self.redis.mget(*[keys[x] for x in missing])):
+                values[index] = value
+
+                if value is not None and self._cacheable(keys[index]):
+                    self._cache.set(keys[index], value, generation)
+
+        return values
+
+    def _forget(self, *keys):
+        if self._loader is not None:
+            self._loader.forget(*keys)
+
+    async def _invalidate(self, *keys):
+        self._forget(*keys)
+
+        if self._cache is None:
+            return
+
+        self._cache.delete(*keys)
+        await self.redis.publish("state_invalidate", orjson.dumps(keys))
+
+    async def watch_invalidations(self):
+        if self._cache is None:
+            return
+
+        delay = 1
+        while True:
+            try:
+                (channel,) = await self.redis.subscribe("state_invalidate")
+                self._cache.clear()
+                delay = 1
+
+                while await channel.wait_message():
+                    try:
+                        self._cache.delete(*orjson.loads(await channel.get()))
+                    except (orjson.JSONDecodeError, TypeError):
+                        log.exception("Failed to parse a state invalidation, clearing the cache.")
+                        self._cache.clear()
+
+                log.warning("State invalidation subscription closed.")
+            except (aioredis.RedisError, OSError):
+                log.exception("State invalidation subscription failed.")
+
+            self._cache.clear()
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 30)
+
+    async def delete(self, key, *keys):
+        result = await self.redis.delete(key, *keys)
+        self._forget(key, *keys)
+        return result
 
     async def get(self, keys, decode=True):
         results = []
         if isinstance(keys, (list, tuple)):
             if len(keys) == 0:
                 return []
-            results.extend([self._loads(x, decode) for x in await self.redis.mget(*keys)])
+            results.extend([self._loads(x, decode) for x in await self._mget(keys)])
         else:
-            results.append(self._loads(await self.redis.get(keys), decode))
+            results.append(self._loads(await self._get(keys), decode))
 
         for index, value in enumerate(results):
             if isinstance(value, dict):
@@ -102,11 +381,25 @@ class State:
     async def expire(self, key, time):
         return await self.redis.expire(key, time)
 
-    async def set(self, key, value=None):
+    async def set(self, key, value=None, expire=0):
         if isinstance(key, (list, tuple)):
-            return await self.redis.mset(*key)
+            result = await self.redis.mset(*key)
+            self._forget(*key[::2])
+            return result
+
+        result = await self.redis.set(key, self._dumps(value), expire=expire)
+        self._forget(key)
+        return result
 
-        return await self.redis.set(key, self._dumps(value))
+    async def hget(self, key, field, decode=True):
+        return self._loads(await self.redis.hget(key, field), decode)
+
+    async def hset(self, key, value, expire=0):
+        tr = self.redis.multi_exec()
+        tr.hmset_dict(key, {x: self._dumps(y) for x, y in value.items()})
+        if expire:
+            tr.expire(key, expire)
+        return await tr.execute()
 
     async def sadd(self, key, *value):
         return await self.redis.sadd(key, *[self._dumps(x) for x in value])
@@ -158,6 +451,186 @@ class State:
 
         return await self.get(matches)
 
+    async def _script(self, script, keys=(), args=()):
+        digest = self._scripts.get(script)
+        if digest is None:
+            digest = self._scripts[script] = hashlib.sha1(script.encode("utf-8")).hexdigest()
+
+        try:
+            return await self.redis.evalsha(digest, keys=list(keys), args=list(args))
+        except aioredis.ReplyError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+
+        return await self.redis.eval(script, keys=list(keys), args=list(args))
+
+    async def _index(self, name, guild_id):
+        for _ in range(2):
+            keys = await self._script(INDEX_GET_SCRIPT, keys=[f"{name}_index:{guild_id}"])
+            if keys != 0:
+                break
+
+            await self._build(f"{name}_index:{guild_id}", self._index_build, name, guild_id)
+
+        return [x.decode("utf-8") for x in keys or [] if x]
+
+    async def _index_build(self, temp, name, guild_id):
+        prefix = f"{name}:"
+        members = [""]
+
+        async for member in self.redis.isscan(f"guild_keys:{guild_id}", count=BUILD_CHUNK):
+            member = member.decode("utf-8")
+            if member.startswith(prefix):
+                members.append(member)
+
+        for i in range(0, len(members), BUILD_CHUNK):
+            tr = self.redis.multi_exec()
+            tr.sadd(temp, *members[i : i + BUILD_CHUNK])
+            tr.expire(temp, self._index_ttl)
+            await tr.execute()
+
+    async def _index_get_all(self, name, guild_id):
+        return await self.get(await self._index(name, guild_id))
+
+    async def _index_add(self, name, guild_id, key):
+        await self._script(
+            INDEX_UPDATE_SCRIPT, keys=[f"{name}_index:{guild_id}"], args=["add", key]
+        )
+
+    async def _index_remove(self, name, guild_id, key):
+        await self._script(
+            INDEX_UPDATE_SCRIPT, keys=[f"{name}_index:{guild_id}"], args=["remove", key]
+        )
+
+    async def _index_clear(self, guild_id, *names):
+        await self.redis.delete(*[f"{x}_index:{guild_id}" for x in names or INDEX_NAMES])
+
+    async def _build(self, key, func, *args):
+        task = self._builds.get(key)
+        if task is None:
+            task = self._builds[key] = self.loop.create_task(self._build_locked(key, func, *args))
+            task.add_done_callback(lambda _: self._builds.pop(key, None))
+
+        await asyncio.shield(task)
+
+    async def _build_locked(self, key, func, *args):
+        lock = f"{key}_build"
+
+        if not await self.redis.set(lock, 1, expire=60, exist=aioredis.Redis.SET_IF_NOT_EXIST):
+            for _ in range(600):
+                await asyncio.sleep(0.1)
+                if await self.redis.exists(key):
+                    return
+
+        temp = f"{key}_build:{os.urandom(8).hex()}"
+
+        try:
+            await func(temp, *args)
+            await self.redis.rename(temp, key)
+        finally:
+            await self.redis.delete(temp, lock)
+
+    async def _hash_write(self, key, fields, expire):
+        tr = self.redis.multi_exec()
+        tr.hmset_dict(key, fields)
+        tr.expire(key, expire)
+        await tr.execute()
+
+    async def _lookup_build(self, temp, name):
+        pattern = LOOKUP_PATTERNS[name]
+        items = {"": [""]}
+
+        async for member in self.redis.isscan(f"{name}_keys", count=BUILD_CHUNK):
+            member = member.decode("utf-8")
+            match = pattern.match(member)
+            if match:
+                items.setdefault(match.group(1), []).append(member)
+
+        items = list(items.items())
+        for i in range(0, len(items), BUILD_CHUNK):
+            await self._hash_write(
+                temp, {x: ",".join(y) for x, y in items[i : i + BUILD_CHUNK]}, self._index_ttl
+            )
+
+    async def _lookup(self, name, item_id):
+        for _ in range(2):
+            result = await self._script(LOOKUP_GET_SCRIPT, keys=[f"{name}_lookup"], args=[item_id])
+            if result != 0:
+                break
+
+            await self._build(f"{name}_lookup", self._lookup_build, name)
+
+        if not result:
+            return None
+
+        value = self._loads(result[1], True)
+        if isinstance(value, dict):
+            value["_key"] = result[0].decode("utf-8")
+
+        return value
+
+    async def _lookup_add(self, name, item_id, key):
+        await self._script(
+            LOOKUP_UPDATE_SCRIPT, keys=[f"{name}_lookup"], args=["add", item_id, key]
+        )
+
+    async def _lookup_remove(self, name, item_id, key):
+        await self._script(
+            LOOKUP_UPDATE_SCRIPT, keys=[f"{name}_lookup"], args=["remove", item_id, key]
+        )
+
+    def _ticket_user(self, data):
+        match = TICKET_TOPIC.match((data or {}).get("topic") or "")
+        return match.group(1) if match else ""
+
+    async def _tickets(self, guild_id, user_id=""):
+        for _ in range(2):
+            result = await self._script(
+                TICKET_GET_SCRIPT, keys=[f"ticket_index:{guild_id}"], args=[user_id]
+            )
+            if result != 0:
+                break
+
+            await self._build(f"ticket_index:{guild_id}", self._ticket_build, guild_id)
+
+        if result == 0:
+            return []
+
+        channels = []
+        for key, value in zip(result[::2], result[1::2]):
+            value = self._loads(value, True)
+            value["_key"] = key.decode("utf-8")
+            channels.append(value)
+
+        return channels
+
+    async def _ticket_build(self, temp, guild_id):
+        keys = []
+        async for key in self.redis.isscan(f"guild_keys:{guild_id}", count=BUILD_CHUNK):
+            key = key.decode("utf-8")
+            if key.startswith("channel:"):
+                keys.append(key)
+
+        fields = {"": ""}
+        users = {}
+        for i in range(0, len(keys), BUILD_CHUNK):
+            chunk = keys[i : i + BUILD_CHUNK]
+            for key, value in zip(chunk, await self.redis.mget(*chunk)):
+                user_id = self._ticket_user(self._loads(value, True))
+                if user_id:
+                    fields[key] = user_id
+                    users.setdefault(f"user:{user_id}", []).append(key)
+
+        fields.update({x: ",".join(y) for x, y in users.items()})
+        fields = list(fields.items())
+        for i in range(0, len(fields), BUILD_CHUNK):
+            await self._hash_write(temp, dict(fields[i : i + BUILD_CHUNK]), self._ticket_ttl)
+
+    async def _ticket_update(self, guild_id, key, user_id=""):
+        await self._script(
+            TICKET_UPDATE_SCRIPT, keys=[f"ticket_index:{guild_id}"], args=[key, user_id]
+        )
+
     def _key_first(self, obj):
         keys = obj["_key"].split(":")
         return int(keys[1])
@@ -168,10 +641,11 @@ class State:
 
     async def _emojis(self):
         results = await self._members_get_all("emoji")
+        guilds = await self._get_guilds([self._key_first(x) for x in results])
         emojis = []
 
         for result in results:
-            guild = await self._get_guild(self._key_first(result))
+            guild = guilds.get(self._key_first(result))
 
             if guild:
                 emojis.append(Emoji(guild=guild, state=self, data=result))
@@ -186,9 +660,12 @@ class State:
         return []
 
     async def _messages(self):
+        results = await self._members_get_all("message")
+        channels = await self._get_channels([int(x["channel_id"]) for x in results])
+
         messages = []
-        for result in await self._members_get_all("message"):
-            channel = await self.get_channel(int(result["channel_id"]))
+        for result in results:
+            channel = channels.get(int(result["channel_id"]))
 
             if channel:
                 message = Message(channel=channel, state=self, data=result)
@@ -247,10 +724,20 @@ class State:
     def store_user(self, data):
         return User(state=self, data=data)
 
+    async def _set_user(self, data):
+        await self.redis.set(f"user:{data['id']}", self._dumps(data), expire=self._user_ttl)
+        self._forget(f"user:{data['id']}")
+
     async def get_user(self, user_id):
-        result = await self._members_get("member", second=user_id)
+        result = await self.get(f"user:{user_id}")
 
         if result:
+            return User(state=self, data=result)
+
+        result = await self._lookup("member", user_id)
+
+        if result:
+            await self._set_user(result["user"])
             return User(state=self, data=result["user"])
 
         return None
@@ -280,8 +767,13 @@ class State:
     async def emojis(self):
         return await self._emojis()
 
-    async def get_emoji(self, emoji_id):
-        result = await self._members_get("emoji", second=emoji_id)
+    async def get_emoji(self, emoji_id, guild_id=None):
+        result = None
+        if guild_id:
+            result = await self.get(f"emoji:{guild_id}:{emoji_id}")
+
+        if not result:
+            result = await self._lookup("emoji", emoji_id)
 
         if result:
             guild = await self._get_guild(self._key_first(result))
@@ -313,16 +805,19 @@ class State:
     def _remove_private_channel(self, channel):
         return
 
-    async def _get_message(self, msg_id):
-        result = await self._members_get("message", second=msg_id)
+    async def _get_message(self, msg_id, channel_id=None):
+        if channel_id:
+            result = await self.get(f"message:{channel_id}:{msg_id}")
+        else:
+            result = await self._lookup("message", msg_id)
 
         if result:
-            channel = await self.get_channel(self._key_first(result))
+            channel = await self.get_channel(int(result["channel_id"]))
 
             if channel:
-                result = Message(channel=channel, state=self, data=result)
+                return Message(channel=channel, state=self, data=result)
 
-        return result
+        return None
 
     def _add_guild_from_data(self, guild):
         return Guild(state=self, data=guild)
@@ -449,10 +944,12 @@ class State:
 
         self.dispatch("raw_reaction_add", raw)
 
-        message = await self._get_message(raw.message_id)
+        message = await self._get_message(raw.message_id, raw.channel_id)
         if message:
             reaction = Reaction(
-                message=message, data=data, emoji=await self._upgrade_partial_emoji(emoji)
+                message=message,
+                data=data,
+                emoji=await self._upgrade_partial_emoji(emoji, raw.guild_id),
             )
             user = raw.member or await self._get_reaction_user(message.channel, raw.user_id)
 
@@ -463,7 +960,7 @@ class State:
         raw = RawReactionClearEvent(data)
         self.dispatch("raw_reaction_clear", raw)
 
-        message = await self._get_message(raw.message_id)
+        message = await self._get_message(raw.message_id, raw.channel_id)
         if message:
             self.dispatch("reaction_clear", message, None)
 
@@ -477,10 +974,12 @@ class State:
         raw = RawReactionActionEvent(data, emoji, "REACTION_REMOVE")
         self.dispatch("raw_reaction_remove", raw)
 
-        message = await self._get_message(raw.message_id)
+        message = await self._get_message(raw.message_id, raw.channel_id)
         if message:
             reaction = Reaction(
-                message=message, data=data, emoji=await self._upgrade_partial_emoji(emoji)
+                message=message,
+                data=data,
+                emoji=await self._upgrade_partial_emoji(emoji, raw.guild_id),
             )
             user = await self._get_reaction_user(message.channel, raw.user_id)
 
@@ -497,10 +996,12 @@ class State:
         raw = RawReactionClearEmojiEvent(data, emoji)
         self.dispatch("raw_reaction_clear_emoji", raw)
 
-        message = await self._get_message(raw.message_id)
+        message = await self._get_message(raw.message_id, raw.channel_id)
         if message:
             reaction = Reaction(
-                message=message, data=data, emoji=await self._upgrade_partial_emoji(emoji)
+                message=message,
+                data=data,
+                emoji=await self._upgrade_partial_emoji(emoji, raw.guild_id),
             )
             self.dispatch("reaction_clear_emoji", reaction)
 
@@ -533,6 +1034,12 @@ class State:
         self.dispatch("invite_delete", invite)
 
     async def parse_channel_delete(self, data, old):
+        await self._invalidate(f"channel:{data['id']}")
+
+        if data.get("guild_id"):
+            await self._index_remove("channel", data["guild_id"], f"channel:{data['id']}")
+            await self._ticket_update(data["guild_id"], f"channel:{data['id']}")
+
         if old and old["guild_id"]:
             guild = await self._get_guild(utils._get_as_snowflake(data, "guild_id"))
             if guild:
@@ -544,6 +1051,12 @@ class State:
             self.dispatch("private_channel_delete", channel)
 
     async def parse_channel_update(self, data, old):
+        await self._invalidate(f"channel:{data['id']}")
+
+        user_id = self._ticket_user(data)
+        if data.get("guild_id") and (old is None or self._ticket_user(old) != user_id):
+            await self._ticket_update(data["guild_id"], f"channel:{data['id']}", user_id)
+
         channel_type = try_enum(ChannelType, data.get("type"))
         if old and channel_type is ChannelType.private:
             channel = DMChannel(me=self.user, state=self, data=data)
@@ -564,6 +1077,12 @@ class State:
             channel = DMChannel(me=self.user, data=data, state=self)
             self.dispatch("private_channel_create", channel)
         else:
+            await self._index_add("channel", data["guild_id"], f"channel:{data['id']}")
+
+            user_id = self._ticket_user(data)
+            if user_id:
+                await self._ticket_update(data["guild_id"], f"channel:{data['id']}", user_id)
+
             guild = await self._get_guild(utils._get_as_snowflake(data, "guild_id"))
             if guild:
                 channel = factory(guild=guild, state=self, data=data)
@@ -589,12 +1108,21 @@ class State:
         return
 
     async def parse_guild_member_add(self, data, old):
+        key = f"member:{data['guild_id']}:{data['user']['id']}"
+        await self._index_add("member", data["guild_id"], key)
+        await self._lookup_add("member", data["user"]["id"], key)
+        await self._set_user(data["user"])
+
         guild = await self._get_guild(int(data["guild_id"]))
         if guild:
             member = Member(guild=guild, data=data, state=self)
             self.dispatch("member_join", member)
 
     async def parse_guild_member_remove(self, data, old):
+        key = f"member:{data['guild_id']}:{data['user']['id']}"
+        await self._index_remove("member", data["guild_id"], key)
+        await self._lookup_remove("member", data["user"]["id"], key)
+
         if old:
             guild = await self._get_guild(int(data["guild_id"]))
             if guild:
@@ -602,12 +1130,16 @@ class State:
                 self.dispatch("member_remove", member)
 
     async def parse_guild_member_update(self, data, old):
+        await self._set_user(data["user"])
+
+        if not old:
+            return
+
         guild = await self._get_guild(int(data["guild_id"]))
-        if old and guild:
+        if guild:
             member = await guild.get_member(int(data["user"]["id"]))
             if member:
-                old_member = Member._copy(member)
-                old_member._update(old)
+                old_member = Member(data=old, guild=guild, state=self)
                 user_update = old_member._update_inner_user(data["user"])
 
                 if user_update:
@@ -616,6 +1148,11 @@ class State:
                 self.dispatch("member_update", old_member, member)
 
     async def parse_guild_emojis_update(self, data, old):
+        await self._index_clear(data["guild_id"], "emoji")
+
+        for emoji in data["emojis"]:
+            await self._lookup_add("emoji", emoji["id"], f"emoji:{data['guild_id']}:{emoji['id']}")
+
         guild = await self._get_guild(int(data["guild_id"]))
         if guild:
             before_emojis = None
@@ -635,6 +1172,8 @@ class State:
         return
 
     async def parse_guild_create(self, data, old):
+        await self._invalidate(f"guild:{data['id']}")
+
         unavailable = data.get("unavailable")
 
         if unavailable is True:
@@ -653,17 +1192,21 @@ class State:
         return
 
     async def parse_guild_update(self, data, old):
+        await self._invalidate(f"guild:{data['id']}")
+
         guild = await self._get_guild(int(data["id"]))
         if guild:
             old_guild = None
 
             if old:
-                old_guild = copy.copy(guild)
-                old_guild = old_guild._from_data(old)
+                old_guild = Guild(state=self, data=old)
 
             self.dispatch("guild_update", old_guild, guild)
 
     async def parse_guild_delete(self, data, old):
+        await self._invalidate(f"guild:{data['id']}")
+        await self._index_clear(data["id"])
+
         if old:
             old = Guild(state=self, data=old)
             if data.get("unavailable", False):
@@ -685,12 +1228,20 @@ class State:
             self.dispatch("member_unban", guild, self.store_user(data["user"]))
 
     async def parse_guild_role_create(self, data, old):
+        key = f"role:{data['guild_id']}:{data['role']['id']}"
+        await self._invalidate(key)
+        await self._index_add("role", data["guild_id"], key)
+
         guild = await self._get_guild(int(data["guild_id"]))
         if guild:
             role = Role(guild=guild, state=self, data=data["role"])
             self.dispatch("guild_role_create", role)
 
     async def parse_guild_role_delete(self, data, old):
+        key = f"role:{data['guild_id']}:{data['role_id']}"
+        await self._invalidate(key)
+        await self._index_remove("role", data["guild_id"], key)
+
         if old:
             guild = await self._get_guild(int(data["guild_id"]))
             if guild:
@@ -698,6 +1249,8 @@ class State:
                 self.dispatch("guild_role_delete", role)
 
     async def parse_guild_role_update(self, data, old):
+        await self._invalidate(f"role:{data['guild_id']}:{data['role']['id']}")
+
         if old:
             guild = await self._get_guild(int(data["guild_id"]))
             if guild:
@@ -768,40 +1321,124 @@ class State:
             return await channel.guild.get_member(user_id)
         return await self.get_user(user_id)
 
-    async def get_reaction_emoji(self, data):
+    async def get_reaction_emoji(self, data, guild_id=None):
         emoji_id = utils._get_as_snowflake(data, "id")
 
         if not emoji_id:
             return data["name"]
 
-        return await self.get_emoji(emoji_id)
+        return await self.get_emoji(emoji_id, guild_id) or PartialEmoji.with_state(
+            self, id=emoji_id, animated=data.get("animated", False), name=data["name"]
+        )
 
-    async def _upgrade_partial_emoji(self, emoji):
+    async def _upgrade_partial_emoji(self, emoji, guild_id=None):
         if not emoji.id:
             return emoji.name
 
-        return await self.get_emoji(emoji.id)
+        return await self.get_emoji(emoji.id, guild_id) or emoji
 
-    async def _get_channel(self, channel_id):
-        result = await self.get(f"channel:{channel_id}")
+    def _create_channel(self, data, guild):
+        if not data.get("guild_id"):
+            return DMChannel(me=self.user, state=self, data=data)
 
-        if result:
-            if result.get("guild_id"):
-                factory, _ = _channel_factory(result["type"])
-                guild = await self._get_guild(result["guild_id"])
-
-                if guild:
-                    return factory(guild=guild, state=self, data=result)
-            else:
-                return DMChannel(me=self.user, state=self, data=result)
+        if guild and not guild.unavailable:
+            factory, _ = _channel_factory(data["type"])
+            return factory(guild=guild, state=self, data=data)
 
         return None
 
-    async def get_channel(self, channel_id):
+    async def _get_channel(self, channel_id, roles=False):
+        key = f"channel:{channel_id}"
+
+        if not roles and self._cacheable(key):
+            result = self._cache.get(key)
+
+            if result is not None:
+                result = self._loads(result, True)
+                result["_key"] = key
+
+                if not result.get("guild_id"):
+                    return self._create_channel(result, None)
+
+                return self._create_channel(result, await self._get_guild(result["guild_id"]))
+
+        generation = self._cache.generation if self._cache is not None else None
+
+        for _ in range(2):
+            results = await self._script(CHANNEL_GET_SCRIPT, keys=[key], args=[int(roles)])
+            if len(results) != 3:
+                break
+
+            result = self._loads(results[0], True)
+            await self._build(
+                f"role_index:{result['guild_id']}", self._index_build, "role", result["guild_id"]
+            )
+
+        if not results:
+            return None
+
+        if len(results) == 3:
+            results, roles = results[:2], False
+
+        result = self._loads(results[0], True)
+        result["_key"] = key
+
+        if self._cache is not None:
+            self._cache.set(key, results[0], generation)
+
+            if len(results) >= 2:
+                self._cache.set(f"guild:{result['guild_id']}", results[1], generation)
+
+        if len(results) < 2:
+            return self._create_channel(result, None)
+
+        role_data = None
+        if roles:
+            role_data = [self._loads(x, True) for x in results[3::2]]
+
+            if self._cache is not None:
+                for role_key, value in zip(results[2::2], results[3::2]):
+                    self._cache.set(role_key.decode("utf-8"), value, generation)
+
+        guild = Guild(state=self, data=self._loads(results[1], True), roles=role_data)
+        return self._create_channel(result, guild)
+
+    async def _get_guilds(self, guild_ids):
+        guild_ids = list(set(guild_ids))
+
+        guilds = {}
+        for guild_id, result in zip(guild_ids, await self._mget([f"guild:{x}" for x in guild_ids])):
+            if result is not None:
+                guild = Guild(state=self, data=self._loads(result, True))
+
+                if not guild.unavailable:
+                    guilds[int(guild_id)] = guild
+
+        return guilds
+
+    async def _get_channels(self, channel_ids):
+        channel_ids = list(set(channel_ids))
+        results = [
+            self._loads(x, True) for x in await self._mget([f"channel:{x}" for x in channel_ids])
+        ]
+        guilds = await self._get_guilds([x["guild_id"] for x in results if x and x.get("guild_id")])
+
+        channels = {}
+        for channel_id, result in zip(channel_ids, results):
+            if result:
+                guild = guilds.get(int(result["guild_id"])) if result.get("guild_id") else None
+                channel = self._create_channel(result, guild)
+
+                if channel:
+                    channels[int(channel_id)] = channel
+
+        return channels
+
+    async def get_channel(self, channel_id, roles=False):
         if not channel_id:
             return None
 
-        return await self._get_channel(channel_id)
+        return await self._get_channel(channel_id, roles=roles)
 
     def create_message(self, *, channel, data):
         message = Message(state=self, channel=channel, data=data)
@@ -83,6 +83,8 @@ class Admin(commands.Cog):
             timestamp = int(expiry.replace(tzinfo=timezone.utc).timestamp() * 1000)
             await conn.execute("INSERT INTO premium VALUES ($1, $2, $3)", user.id, [], timestamp)
 
+        await self.bot.state.delete(f"premium_slots:{user.id}")
+
         await ctx.send(Embed("Successfully assigned that user premium temporarily."))
 
     @checks.is_admin()
@@ -96,6 +98,8 @@ class Admin(commands.Cog):
 
             await conn.execute("DELETE FROM premium WHERE identifier=$1", user.id)
 
+        await self.bot.state.delete(f"premium_slots:{user.id}")
+
         await ctx.send(Embed("Successfully removed that user's premium."))
 
     @checks.is_admin()
@@ -114,6 +118,8 @@ class Admin(commands.Cog):
                 "UPDATE premium SET identifier=$1 WHERE identifier=$2", other.id, user.id
             )
 
+        await self.bot.state.delete(f"premium_slots:{user.id}", f"premium_slots:{other.id}")
+
         await ctx.send(Embed("Successfully transferred that user's premium."))
 
     @checks.is_admin()
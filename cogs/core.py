@@ -2,7 +2,6 @@ import asyncio
 import copy
 import io
 import logging
-import time
 
 import discord
 
@@ -64,9 +63,9 @@ class Core(commands.Cog):
             "the conversation between staff and the user. Please fill in the suitable response "
             "given the transcript. Only give 1 response option. Do not output additional text such "
             "as 'My response would be...'. Try to appear as supportive as possible.\nHere are "
-            f"additional information you should consider (if any): {data[13]}\nHere are additional "
-            f"instructions for your response (if any): {instructions}\n\nFull transcript: "
-            f"{truncated_history}.\n\nStaff response: "
+            f"additional information you should consider (if any): {data.ai_prompt}\nHere are "
+            f"additional instructions for your response (if any): {instructions}\n\nFull "
+            f"transcript: {truncated_history}.\n\nStaff response: "
         )
 
         try:
@@ -82,26 +81,19 @@ class Core(commands.Cog):
 
         msg = await ctx.send(Embed("AI Reply", response[:2048]))
 
-        await msg.add_reaction("✅")
-        await msg.add_reaction("❌")
+        self.bot.reactions.add(msg, "✅", "❌")
 
-        await self.bot.state.set(
-            f"reaction_menu:{msg.channel.id}:{msg.id}",
+        await tools.create_reaction_menu(
+            self.bot,
+            msg,
+            "aireply",
             {
-                "kind": "aireply",
-                "end": int(time.time()) + 180,
-                "data": {
-                    "anon": data[10],
-                    "prefix": ctx.prefix,
-                    "author": ctx.author.id,
-                    "guild": ctx.guild.id,
-                },
+                "anon": data.anonymous,
+                "prefix": ctx.prefix,
+                "author": ctx.author.id,
+                "guild": ctx.guild.id,
             },
         )
-        await self.bot.state.sadd(
-            "reaction_menu_keys",
-            f"reaction_menu:{msg.channel.id}:{msg.id}",
-        )
 
     async def generate_history(self, channel):
         history = ""
@@ -153,7 +145,7 @@ class Core(commands.Cog):
 
         data = await tools.get_data(self.bot, ctx.guild.id)
 
-        if data[7] > 0:
+        if data.logging_plus > 0:
             history = await self.generate_history(ctx.channel)
 
         try:
@@ -179,10 +171,10 @@ class Core(commands.Cog):
         else:
             dm_channel = tools.get_modmail_channel(self.bot, ctx.channel)
 
-            if data[6]:
+            if data.goodbye:
                 embed2 = Embed(
                     "Closing Message",
-                    tools.tag_format(data[6], member),
+                    tools.tag_format(data.goodbye, member),
                     colour=0xFF4500,
                     timestamp=True,
                 )
@@ -197,10 +189,10 @@ class Core(commands.Cog):
             except discord.Forbidden:
                 pass
 
-        if data[4] is None:
+        if data.logging is None:
             return
 
-        channel = await ctx.guild.get_channel(data[4])
+        channel = await ctx.guild.get_channel(data.logging)
         if channel is None:
             return
 
@@ -223,7 +215,7 @@ class Core(commands.Cog):
             ctx.author.avatar_url,
         )
 
-        if data[7] > 0:
+        if data.logging_plus > 0:
             file = discord.File(
                 io.BytesIO(history.encode()),
                 f"modmail_log_{tools.get_modmail_user(ctx.channel).id}.txt",
@@ -234,7 +226,7 @@ class Core(commands.Cog):
             except discord.Forbidden:
                 return
 
-            if self.bot.ai is not None and data[7] == 1:
+            if self.bot.ai is not None and data.logging_plus == 1:
                 try:
                     truncated_history = "\n".join(history.splitlines()[-100:])
                     summary = await self.bot.ai_generate(
@@ -286,12 +278,11 @@ class Core(commands.Cog):
     @commands.guild_only()
     @commands.command(description="Close all the tickets.", usage="closeall [reason]")
     async def closeall(self, ctx, *, reason: str = None):
-        for channel in await ctx.guild.text_channels():
-            if tools.is_modmail_channel(channel):
-                msg = copy.copy(ctx.message)
-                msg.channel = channel
-                new_ctx = await self.bot.get_context(msg, cls=type(ctx))
-                await self.close_channel(new_ctx, reason)
+        for channel in await ctx.guild.ticket_channels():
+            msg = copy.copy(ctx.message)
+            msg.channel = channel
+            new_ctx = await self.bot.get_context(msg, cls=type(ctx))
+            await self.close_channel(new_ctx, reason)
 
         try:
             await ctx.send(Embed("All tickets are successfully closed."))
@@ -304,12 +295,11 @@ class Core(commands.Cog):
     @commands.guild_only()
     @commands.command(description="Close all the tickets anonymously.", usage="acloseall [reason]")
     async def acloseall(self, ctx, *, reason: str = None):
-        for channel in await ctx.guild.text_channels():
-            if tools.is_modmail_channel(channel):
-                msg = copy.copy(ctx.message)
-                msg.channel = channel
-                new_ctx = await self.bot.get_context(msg, cls=type(ctx))
-                await self.close_channel(new_ctx, reason, True)
+        for channel in await ctx.guild.ticket_channels():
+            msg = copy.copy(ctx.message)
+            msg.channel = channel
+            new_ctx = await self.bot.get_context(msg, cls=type(ctx))
+            await self.close_channel(new_ctx, reason, True)
 
         try:
             await ctx.send(Embed("All tickets are successfully closed anonymously."))
@@ -342,7 +332,7 @@ class Core(commands.Cog):
             await ctx.send(ErrorEmbed("The user(s) are not found. Please try again."))
             return
 
-        blacklist = (await tools.get_data(self.bot, ctx.guild.id))[9]
+        blacklist = (await tools.get_data(self.bot, ctx.guild.id)).blacklist
         for user in users:
             if user.id not in blacklist:
                 blacklist.append(user.id)
@@ -352,6 +342,8 @@ class Core(commands.Cog):
                 "UPDATE data SET blacklist=$1 WHERE guild=$2", blacklist, ctx.guild.id
             )
 
+        await tools.invalidate_data(self.bot, ctx.guild.id)
+
         await ctx.send(Embed("The user(s) are blacklisted successfully."))
 
     @checks.in_database()
@@ -380,7 +372,7 @@ class Core(commands.Cog):
             await ctx.send(ErrorEmbed("The user(s) are not found. Please try again."))
             return
 
-        blacklist = (await tools.get_data(self.bot, ctx.guild.id))[9]
+        blacklist = (await tools.get_data(self.bot, ctx.guild.id)).blacklist
         for user in users:
             if user.id in blacklist:
                 blacklist.remove(user.id)
@@ -390,6 +382,8 @@ class Core(commands.Cog):
                 "UPDATE data SET blacklist=$1 WHERE guild=$2", blacklist, ctx.guild.id
             )
 
+        await tools.invalidate_data(self.bot, ctx.guild.id)
+
         await ctx.send(Embed("The user(s) are whitelisted successfully."))
 
     @checks.in_database()
@@ -400,6 +394,8 @@ class Core(commands.Cog):
         async with self.bot.pool.acquire() as conn:
             await conn.execute("UPDATE data SET blacklist=$1 WHERE guild=$2", [], ctx.guild.id)
 
+        await tools.invalidate_data(self.bot, ctx.guild.id)
+
         await ctx.send(Embed("The blacklist is cleared successfully."))
 
     @checks.in_database()
@@ -407,7 +403,7 @@ class Core(commands.Cog):
     @commands.guild_only()
     @commands.command(description="View the blacklist.", usage="viewblacklist")
     async def viewblacklist(self, ctx):
-        blacklist = (await tools.get_data(self.bot, ctx.guild.id))[9]
+        blacklist = (await tools.get_data(self.bot, ctx.guild.id)).blacklist
         if not blacklist:
             await ctx.send(Embed("No one is blacklisted."))
             return
@@ -1,7 +1,6 @@
 import io
 import logging
 import string
-import time
 
 import discord
 
@@ -37,7 +36,7 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
 
         data = await tools.get_data(self.bot, guild.id)
 
-        category = await guild.get_channel(data[2])
+        category, log_channel = await guild.get_channels(data.category, data.logging)
         if not category:
             await message.channel.send(
                 ErrorEmbed(
@@ -46,23 +45,18 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
             )
             return
 
-        if message.author.id in data[9]:
+        if message.author.id in data.blacklist:
             await message.channel.send(
                 ErrorEmbed("That server has blacklisted you from sending a message there.")
             )
             return
 
-        channel = None
-        for text_channel in await guild.text_channels():
-            if tools.is_modmail_channel(text_channel, message.author.id):
-                channel = text_channel
-                break
-
+        channel = await guild.ticket_channel(message.author.id)
         if channel is None:
-            if data[12] is not None:
+            if data.toggle is not None:
                 embed = ErrorEmbed(
                     "Ticket Creation Disabled",
-                    data[12] if data[12] else "No reason was provided.",
+                    data.toggle if data.toggle else "No reason was provided.",
                     timestamp=True,
                 )
                 embed.set_footer(f"{guild.name} | {guild.id}", guild.icon_url)
@@ -114,7 +108,6 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
                     )
                     return
 
-            log_channel = await guild.get_channel(data[4])
             if log_channel:
                 embed = Embed(
                     title="New Ticket",
@@ -141,7 +134,7 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
                 timestamp=True,
             )
 
-            if data[11]:
+            if data.command_only:
                 embed.description = (
                     f"Type `{prefix}reply <message>` in this channel to reply. All other messages "
                     "are ignored, and can be used for staff discussion. Use the command "
@@ -166,7 +159,7 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
             )
 
             roles = []
-            for role in data[8]:
+            for role in data.ping_roles:
                 if role == guild.id:
                     roles.append("@everyone")
                 elif role == -1:
@@ -184,10 +177,10 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
                 )
                 return
 
-            if data[5]:
+            if data.welcome:
                 embed = Embed(
                     "Greeting Message",
-                    tools.tag_format(data[5], message.author),
+                    tools.tag_format(data.welcome, message.author),
                     colour=0xFF4500,
                     timestamp=True,
                 )
@@ -244,24 +237,21 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
             guild = await self.bot.get_guild(menu["data"]["guild"])
             message = Message(state=self.bot.state, channel=channel, data=menu["data"]["msg"])
 
+            self.bot.reactions.cancel(msg)
+
             if payload.emoji.name == "✅":
                 await self.send_mail(message, guild)
                 await msg.delete()
             else:
+                self.bot.reactions.remove(msg, self.bot.user, "✅", "🔁", "❌")
+
                 if payload.emoji.name == "🔁":
                     await msg.edit(Embed("Loading servers..."))
                     self.bot.loop.create_task(tools.select_guild(self.bot, message, msg))
                 elif payload.emoji.name == "❌":
                     await msg.edit(ErrorEmbed("Request cancelled successfully."))
 
-                for reaction in ["✅", "🔁", "❌"]:
-                    await msg.remove_reaction(reaction, self.bot.user)
-
-            await self.bot.state.delete(f"reaction_menu:{channel.id}:{msg.id}")
-            await self.bot.state.srem(
-                "reaction_menu_keys",
-                f"reaction_menu:{channel.id}:{msg.id}",
-            )
+            await tools.delete_reaction_menu(self.bot, channel, msg)
             return
 
         numbers = ["1⃣", "2⃣", "3⃣", "4⃣", "5⃣", "6⃣", "7⃣", "8⃣", "9⃣", "🔟"]
@@ -272,13 +262,18 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
                 return
 
             page = menu["data"]["page"]
-            all_pages = menu["data"]["all_pages"]
+            pages = menu["data"]["pages"]
 
             if payload.emoji.name not in arrows:
                 chosen = numbers.index(payload.emoji.name)
+                self.bot.reactions.cancel(msg)
                 await msg.delete()
 
-                fields = all_pages[page]["fields"]
+                embed = await tools.get_reaction_menu_page(self.bot, channel, msg, page)
+                if embed is None:
+                    return
+
+                fields = embed["fields"]
                 if chosen > len(fields):
                     return
 
@@ -286,41 +281,38 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
                 message = Message(state=self.bot.state, channel=channel, data=menu["data"]["msg"])
                 await self.send_mail(message, guild)
 
-                await self.bot.state.delete(f"reaction_menu:{channel.id}:{msg.id}")
-                await self.bot.state.srem(
-                    "reaction_menu_keys",
-                    f"reaction_menu:{channel.id}:{msg.id}",
-                )
+                await tools.delete_reaction_menu(self.bot, channel, msg)
                 return
 
             if payload.emoji.name == "◀️" and page > 0:
                 page -= 1
 
-                new_page = Embed.from_dict(all_pages[page])
+                new_page = await tools.get_reaction_menu_page(self.bot, channel, msg, page)
+                if new_page is None:
+                    return
+
+                new_page = Embed.from_dict(new_page)
                 await msg.edit(new_page)
 
                 menu["data"]["page"] = page
-                menu["end"] = int(time.time()) + 180
-                await self.bot.state.set(f"reaction_menu:{channel.id}:{msg.id}", menu)
+                await tools.update_reaction_menu(self.bot, channel, msg, menu)
 
-                for reaction in numbers[: len(new_page.fields)]:
-                    await msg.add_reaction(reaction)
+                self.bot.reactions.add(msg, *numbers[: len(new_page.fields)])
 
-            if payload.emoji.name == "▶️" and page < len(all_pages) - 1:
+            if payload.emoji.name == "▶️" and page < pages - 1:
                 page += 1
 
-                new_page = Embed.from_dict(all_pages[page])
+                new_page = await tools.get_reaction_menu_page(self.bot, channel, msg, page)
+                if new_page is None:
+                    return
+
+                new_page = Embed.from_dict(new_page)
                 await msg.edit(new_page)
 
                 menu["data"]["page"] = page
-                menu["end"] = int(time.time()) + 180
-                await self.bot.state.set(f"reaction_menu:{channel.id}:{msg.id}", menu)
+                await tools.update_reaction_menu(self.bot, channel, msg, menu)
 
-                for reaction in numbers[len(new_page.fields) :]:
-                    try:
-                        await msg.remove_reaction(reaction, self.bot.user)
-                    except discord.NotFound:
-                        pass
+                self.bot.reactions.remove(msg, self.bot.user, *numbers[len(new_page.fields) :])
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -371,24 +363,10 @@ class DirectMessageEvents(commands.Cog, name="Direct Message"):
             )
             msg = await message.channel.send(embed)
 
-            await msg.add_reaction("✅")
-            await msg.add_reaction("🔁")
-            await msg.add_reaction("❌")
-
-            await self.bot.state.set(
-                f"reaction_menu:{msg.channel.id}:{msg.id}",
-                {
-                    "kind": "confirmation",
-                    "end": int(time.time()) + 180,
-                    "data": {
-                        "guild": guild.id,
-                        "msg": message._data,
-                    },
-                },
-            )
-            await self.bot.state.sadd(
-                "reaction_menu_keys",
-                f"reaction_menu:{msg.channel.id}:{msg.id}",
+            self.bot.reactions.add(msg, "✅", "🔁", "❌")
+
+            await tools.create_reaction_menu(
+                self.bot, msg, "confirmation", {"guild": guild.id, "msg": message._data}
             )
         elif guild:
             await self.send_mail(message, guild)
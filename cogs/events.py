@@ -1,5 +1,4 @@
 import logging
-import time
 
 import discord
 
@@ -20,6 +19,27 @@ class Events(commands.Cog):
     async def on_ready(self):
         pass
 
+    @commands.Cog.listener()
+    async def on_member_update(self, before, after):
+        if str(after.guild.id) != self.bot.config.MAIN_SERVER or before._roles == after._roles:
+            return
+
+        await tools.refresh_premium_slots(self.bot, after.id, after)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member):
+        if await self.bot.state.redis.exists(f"user_guilds:{member.id}"):
+            await self.bot.state.redis.sadd(f"user_guilds:{member.id}", f"guild:{member.guild.id}")
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member):
+        await self.bot.state.redis.srem(f"user_guilds:{member.id}", f"guild:{member.guild.id}")
+
+        if str(member.guild.id) != self.bot.config.MAIN_SERVER:
+            return
+
+        await self.bot.state.delete(f"premium_slots:{member.id}")
+
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload):
         if payload.user_id == self.bot.id:
@@ -33,9 +53,10 @@ class Events(commands.Cog):
             if menu is None:
                 return
 
+            self.bot.reactions.cancel(message)
+
             if payload.emoji.name == "✅":
-                guild = await self.bot.get_guild(menu["data"]["guild"])
-                channel = await guild.get_channel(channel.id)
+                channel = await self.bot.get_channel(channel.id)
                 message = await channel.fetch_message(message.id)
                 message.author = await self.bot.fetch_user(menu["data"]["author"])
                 message.content = message.embeds[0].description
@@ -48,11 +69,7 @@ class Events(commands.Cog):
                 except (discord.Forbidden, discord.NotFound):
                     pass
 
-            await self.bot.state.delete(f"reaction_menu:{channel.id}:{message.id}")
-            await self.bot.state.srem(
-                "reaction_menu_keys",
-                f"reaction_menu:{channel.id}:{message.id}",
-            )
+            await tools.delete_reaction_menu(self.bot, channel, message)
             return
 
         if payload.emoji.name in ["⏮️", "◀️", "⏹️", "▶️", "⏭️"]:
@@ -61,45 +78,40 @@ class Events(commands.Cog):
                 return
 
             if payload.emoji.name == "⏹️":
+                self.bot.reactions.cancel(message)
+
                 try:
                     await message.clear_reactions()
                 except discord.Forbidden:
-                    for emoji in ["⏮️", "◀️", "⏹️", "▶️", "⏭️"]:
-                        try:
-                            await message.remove_reaction(emoji, self.bot.user)
-                        except discord.NotFound:
-                            pass
-
-                await self.bot.state.delete(f"reaction_menu:{channel.id}:{message.id}")
-                await self.bot.state.srem(
-                    "reaction_menu_keys",
-                    f"reaction_menu:{channel.id}:{message.id}",
-                )
+                    self.bot.reactions.remove(message, self.bot.user, "⏮️", "◀️", "⏹️", "▶️", "⏭️")
+
+                await tools.delete_reaction_menu(self.bot, channel, message)
                 return
 
             page = menu["data"]["page"]
-            all_pages = menu["data"]["all_pages"]
+            pages = menu["data"]["pages"]
 
             if payload.emoji.name == "⏮️":
                 page = 0
             elif payload.emoji.name == "◀️" and page > 0:
                 page -= 1
-            elif payload.emoji.name == "▶️" and page < len(all_pages) - 1:
+            elif payload.emoji.name == "▶️" and page < pages - 1:
                 page += 1
             elif payload.emoji.name == "⏭️":
-                page = len(all_pages) - 1
+                page = pages - 1
+
+            embed = await tools.get_reaction_menu_page(self.bot, channel, message, page)
+            if embed is None:
+                return
 
-            await message.edit(Embed.from_dict(all_pages[page]))
+            await message.edit(Embed.from_dict(embed))
 
-            try:
-                member = tools.create_fake_user(payload.user_id)
-                await message.remove_reaction(payload.emoji, member)
-            except (discord.Forbidden, discord.NotFound):
-                pass
+            self.bot.reactions.remove(
+                message, tools.create_fake_user(payload.user_id), payload.emoji
+            )
 
             menu["data"]["page"] = page
-            menu["end"] = int(time.time()) + 180
-            await self.bot.state.set(f"reaction_menu:{channel.id}:{message.id}", menu)
+            await tools.update_reaction_menu(self.bot, channel, message, menu)
 
     @commands.Cog.listener()
     async def on_message(self, message):
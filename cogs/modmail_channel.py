@@ -20,7 +20,11 @@ class ModMailEvents(commands.Cog):
         if message.author.bot or not message.guild or not tools.is_modmail_channel(message.channel):
             return
 
-        permissions = await message.channel.permissions_for(await message.guild.me())
+        channel = await self.bot.get_channel(message.channel.id, roles=True)
+        if channel is None:
+            return
+
+        permissions = await channel.permissions_for(await channel.guild.me())
         if permissions.send_messages is False or permissions.embed_links is False:
             return
 
@@ -30,14 +34,14 @@ class ModMailEvents(commands.Cog):
                 return
 
         data = await tools.get_data(self.bot, message.guild.id)
-        if data[11] is True:
+        if data.command_only is True:
             return
 
         if await tools.is_user_banned(self.bot, message.author):
             await message.channel.send(ErrorEmbed("You are banned from this bot."))
             return
 
-        if data[10] is True:
+        if data.anonymous is True:
             await self.send_mail_mod(message, prefix, anon=True)
             return
 
@@ -49,7 +53,7 @@ class ModMailEvents(commands.Cog):
         data = await tools.get_data(self.bot, message.guild.id)
         user = tools.get_modmail_user(message.channel)
 
-        if user.id in data[9]:
+        if user.id in data.blacklist:
             await message.channel.send(
                 ErrorEmbed(
                     "That user is blacklisted from sending a message here. You need to whitelist "
@@ -87,12 +87,7 @@ class Premium(commands.Cog):
         if guild is None:
             guild = ctx.guild
 
-        async with self.bot.pool.acquire() as conn:
-            res = await conn.fetchrow(
-                "SELECT identifier FROM premium WHERE $1=any(guild)", guild.id
-            )
-
-        if res:
+        if await tools.is_premium_guild(self.bot, guild.id):
             await ctx.send(ErrorEmbed("The server already has premium."))
             return
 
@@ -117,6 +112,8 @@ class Premium(commands.Cog):
                 ctx.author.id,
             )
 
+        await tools.load_premium_guilds(self.bot)
+
         await ctx.send(Embed("The server now has premium."))
 
     @checks.is_patron()
@@ -104,18 +104,12 @@ class Scheduler:
 
                 for row in premium:
                     for guild in row[1]:
-                        await conn.execute(
-                            "UPDATE data SET welcome=$1, goodbye=$2, loggingplus=$3, aiprompt=$4 "
-                            "WHERE guild=$5",
-                            None,
-                            None,
-                            0,
-                            None,
-                            guild,
-                        )
-                        await conn.execute("DELETE FROM snippet WHERE guild=$1", guild)
+                        await tools.remove_premium(self.bot, guild)
 
                     await conn.execute("DELETE FROM premium WHERE identifier=$1", row[0])
+                    await self.bot.state.delete(f"premium_slots:{row[0]}")
+
+            await tools.load_premium_guilds(self.bot)
 
             await asyncio.sleep(60)
 
@@ -193,14 +187,8 @@ class Scheduler:
                     except discord.HTTPException:
                         emojis = []
 
-                await self.bot.state.delete(menu_key)
-                await self.bot.state.srem("reaction_menu_keys", menu_key)
-
-                for emoji in emojis:
-                    try:
-                        await message.remove_reaction(emoji, self.bot.user)
-                    except discord.HTTPException:
-                        pass
+                await tools.delete_reaction_menu(self.bot, channel, message)
+                self.bot.reactions.remove(message, self.bot.user, *emojis)
 
             await asyncio.sleep(30)
 
@@ -256,6 +244,8 @@ class Main:
                 body["token"],
             )
 
+        await self.bot.state.delete(f"user_guilds:{body['id']}")
+
         user_select = await self.bot.state.get(f"user_select:{body['id']}")
         if not user_select:
             return
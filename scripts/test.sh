@@ -0,0 +1,6 @@
+#!/bin/bash
+
+WORKDIR=$(pwd)
+
+echo "Testing Python..."
+cd "$WORKDIR" && python -m pytest -q tests
@@ -0,0 +1,66 @@
+import asyncio
+import inspect
+import threading
+
+import aioredis
+import pytest
+
+from fakeredis import TcpFakeServer
+from fakeredis._clients._tcp_server import TCPFakeRequestHandler
+from redis.exceptions import ResponseError
+
+
+class RequestHandler(TCPFakeRequestHandler):
+    def setup(self):
+        super().setup()
+        read_response = self.current_client.read_response
+
+        def read():
+            try:
+                return read_response()
+            except ResponseError as e:
+                return e
+
+        self.current_client.read_response = read
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+
+    args = {x: pyfuncitem.funcargs[x] for x in pyfuncitem._fixtureinfo.argnames}
+    pyfuncitem.funcargs["loop"].run_until_complete(pyfuncitem.obj(**args))
+    return True
+
+
+@pytest.fixture(scope="session")
+def redis_address():
+    server = TcpFakeServer(("127.0.0.1", 0), server_type="redis")
+    server.RequestHandlerClass = RequestHandler
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.server_address
+
+
+@pytest.fixture
+def loop():
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture
+def redis(redis_address, loop):
+    async def connect():
+        redis = await aioredis.create_redis_pool(redis_address)
+        await redis.flushall()
+        return redis
+
+    async def close():
+        redis.close()
+        await redis.wait_closed()
+
+    redis = loop.run_until_complete(connect())
+    yield redis
+    loop.run_until_complete(close())
@@ -0,0 +1,189 @@
+import asyncio
+
+from types import SimpleNamespace
+
+import orjson
+import pytest
+
+from classes.consumer import LANES, Acker, Consumer
+
+
+class Metric:
+    def __init__(self):
+        self.values = []
+
+    def inc(self, labels):
+        self.values.append(labels)
+
+    def set(self, labels, value):
+        self.values.append((labels, value))
+
+    def observe(self, labels, value):
+        self.values.append((labels, value))
+
+
+class Prom:
+    def __getattr__(self, name):
+        metric = Metric()
+        setattr(self, name, metric)
+        return metric
+
+
+class Message:
+    def __init__(self, payload, delivery_tag=1, redelivered=False):
+        self.body = orjson.dumps(payload)
+        self.delivery_tag = delivery_tag
+        self.redelivered = redelivered
+        self.acks = []
+
+    async def ack(self, multiple=False):
+        self.acks.append(multiple)
+
+
+class Bot:
+    def __init__(self, loop, redis):
+        self.loop = loop
+        self.id = 1
+        self.prom = Prom()
+        self.state = SimpleNamespace(redis=redis)
+        self.config = SimpleNamespace(DEFAULT_PREFIX="=")
+        self.received = []
+        self.fail = False
+        self._enabled_events = ["MESSAGE_CREATE", "MESSAGE_REACTION_ADD"]
+
+    async def receive_message(self, body, payload):
+        self.received.append(payload)
+
+        if self.fail:
+            raise RuntimeError()
+
+
+def message_create(message_id=10):
+    return {"t": "MESSAGE_CREATE", "d": {"id": str(message_id), "channel_id": "2"}}
+
+
+def reaction_add():
+    return {
+        "t": "MESSAGE_REACTION_ADD",
+        "d": {"message_id": "10", "channel_id": "2", "user_id": "3", "emoji": {"name": "▶️"}},
+    }
+
+
+@pytest.fixture
+def bot(loop, redis):
+    return Bot(loop, redis)
+
+
+@pytest.fixture
+def consumer(bot):
+    return Consumer(
+        bot,
+        queue=None,
+        lanes=LANES,
+        concurrency=4,
+        timeout=1,
+        ack_batch=10,
+        dedupe_ttl=60,
+        shed_depths=[1000, 5000],
+    )
+
+
+async def handle(consumer, message):
+    await consumer._handle(message, orjson.loads(message.body), consumer.bot.loop.time())
+
+
+async def test_duplicate_message_is_dropped(loop, redis, bot, consumer):
+    await handle(consumer, Message(message_create()))
+    await handle(consumer, Message(message_create()))
+
+    assert len(bot.received) == 1
+    assert bot.prom.events_duplicate.values == [{"event": "MESSAGE_CREATE"}]
+    assert await redis.get("event_seen:10") == b"done"
+    assert 0 < await redis.ttl("event_seen:10") <= 60
+
+
+async def test_reactions_are_not_deduplicated(bot, consumer):
+    await handle(consumer, Message(reaction_add()))
+    await handle(consumer, Message(reaction_add()))
+
+    assert len(bot.received) == 2
+
+
+async def test_failed_message_is_not_claimed(redis, bot, consumer):
+    bot.fail = True
+
+    with pytest.raises(RuntimeError):
+        await handle(consumer, Message(message_create()))
+
+    assert not await redis.exists("event_seen:10")
+
+    bot.fail = False
+    await handle(consumer, Message(message_create()))
+
+    assert len(bot.received) == 2
+
+
+async def test_redelivered_message_takes_over_claim(redis, bot, consumer):
+    await redis.set("event_seen:10", "processing", expire=30)
+
+    await handle(consumer, Message(message_create()))
+    assert len(bot.received) == 0
+
+    await handle(consumer, Message(message_create(), redelivered=True))
+    assert len(bot.received) == 1
+    assert await redis.get("event_seen:10") == b"done"
+
+    await handle(consumer, Message(message_create(), redelivered=True))
+    assert len(bot.received) == 1
+
+
+def acker(loop, batch=10):
+    return Acker(loop=loop, batch=batch, delay=0.01)
+
+
+async def test_acker_acks_completed_prefix_once(loop):
+    ack = acker(loop)
+    messages = [Message(message_create(x), delivery_tag=x) for x in range(1, 4)]
+    entries = [ack.add(x) for x in messages]
+
+    for entry in entries:
+        ack.complete(entry)
+
+    await asyncio.sleep(0.05)
+
+    assert [x.acks for x in messages] == [[], [], [True]]
+
+
+async def test_acker_acks_out_of_order_completions(loop):
+    ack = acker(loop)
+    messages = [Message(message_create(x), delivery_tag=x) for x in range(1, 5)]
+    entries = [ack.add(x) for x in messages]
+
+    ack.complete(entries[2])
+    ack.complete(entries[3])
+    await asyncio.sleep(0.05)
+
+    assert [x.acks for x in messages] == [[], [], [False], [False]]
+
+    ack.complete(entries[0])
+    await asyncio.sleep(0.05)
+
+    assert [x.acks for x in messages] == [[True], [], [False], [False]]
+
+    ack.complete(entries[1])
+    await asyncio.sleep(0.05)
+
+    assert [x.acks for x in messages] == [[True], [True], [False], [False]]
+    assert not ack._pending
+
+
+async def test_acker_flushes_full_batch(loop):
+    ack = acker(loop, batch=2)
+    messages = [Message(message_create(x), delivery_tag=x) for x in range(1, 4)]
+    entries = [ack.add(x) for x in messages]
+
+    ack.complete(entries[1])
+    ack.complete(entries[2])
+    await asyncio.sleep(0)
+
+    assert [x.acks for x in messages] == [[], [False], [False]]
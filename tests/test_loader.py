@@ -0,0 +1,58 @@
+import asyncio
+
+from classes.loader import Loader
+
+
+class Redis:
+    def __init__(self, loop):
+        self.loop = loop
+        self.values = {}
+        self.calls = []
+
+    async def mget(self, *keys):
+        self.calls.append(keys)
+        values = [self.values.get(x) for x in keys]
+        await asyncio.sleep(0.05)
+        return values
+
+
+async def test_load_batches_keys(loop):
+    redis = Redis(loop)
+    redis.values = {"a": b"1", "b": b"2"}
+    loader = Loader(redis=redis, loop=loop)
+
+    results = await asyncio.gather(loader.load("a"), loader.load("b"), loader.load("a"))
+
+    assert results == [b"1", b"2", b"1"]
+    assert redis.calls == [("a", "b")]
+
+
+async def test_forget_inflight_key(loop):
+    redis = Redis(loop)
+    redis.values = {"a": b"old"}
+    loader = Loader(redis=redis, loop=loop)
+
+    old = loop.create_task(loader.load("a"))
+    await asyncio.sleep(0.01)
+
+    redis.values["a"] = b"new"
+    loader.forget("a")
+
+    assert await loader.load("a") == b"new"
+    assert await old == b"old"
+    assert redis.calls == [("a",), ("a",)]
+    assert loader._inflight == {}
+
+
+async def test_forget_pending_key(loop):
+    redis = Redis(loop)
+    redis.values = {"a": b"1"}
+    loader = Loader(redis=redis, loop=loop)
+
+    first = loop.create_task(loader.load("a"))
+    await asyncio.sleep(0)
+    loader.forget("a")
+    second = loop.create_task(loader.load("a"))
+
+    assert await asyncio.wait_for(asyncio.gather(first, second), 1) == [b"1", b"1"]
+    assert loader._pending == {} and loader._inflight == {}
@@ -0,0 +1,63 @@
+import asyncio
+
+from types import SimpleNamespace
+
+from classes.ratelimit import ACQUIRE_SCRIPT, RateLimiter
+from tests.test_state import create_state
+
+ROUTE = SimpleNamespace(bucket="bucket")
+
+
+def response(status=200, **headers):
+    return SimpleNamespace(status=status, headers=headers)
+
+
+def ratelimit_response(remaining, reset_after):
+    return response(
+        **{"X-RateLimit-Remaining": str(remaining), "X-RateLimit-Reset-After": str(reset_after)}
+    )
+
+
+async def test_unknown_bucket_allows_single_probe(loop, redis):
+    limiter = RateLimiter(state=create_state(loop, redis))
+
+    await asyncio.wait_for(limiter.acquire(ROUTE), 1)
+    waiters = [loop.create_task(limiter.acquire(ROUTE)) for _ in range(3)]
+    await asyncio.sleep(0.2)
+
+    assert not any(x.done() for x in waiters)
+
+    await limiter.update(ROUTE, ratelimit_response(2, 10))
+    done, pending = await asyncio.wait(waiters, timeout=0.5)
+
+    assert len(done) == 2
+    assert len(pending) == 1
+
+    for task in pending:
+        task.cancel()
+
+
+async def test_missing_headers_release_probe(loop, redis):
+    limiter = RateLimiter(state=create_state(loop, redis))
+
+    await limiter.acquire(ROUTE)
+    await limiter.update(ROUTE, response())
+
+    await asyncio.wait_for(limiter.acquire(ROUTE), 0.5)
+
+
+async def test_exhausted_bucket_waits_for_reset(loop, redis):
+    state = create_state(loop, redis)
+    limiter = RateLimiter(state=state)
+
+    await limiter.acquire(ROUTE)
+    await limiter.update(ROUTE, response(429, **{"Retry-After": "10"}))
+
+    wait = await state._script(
+        ACQUIRE_SCRIPT,
+        keys=["ratelimit:bucket", "ratelimit:global", "ratelimit_probe:bucket"],
+        args=[5000, 50],
+    )
+
+    assert 9000 < wait <= 10000
+    assert not await redis.exists("ratelimit_probe:bucket")
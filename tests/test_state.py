@@ -0,0 +1,319 @@
+import asyncio
+import copy
+
+from types import SimpleNamespace
+
+import orjson
+
+from classes import state as state_module
+from classes.cache import Cache
+from classes.state import State
+from cogs.events import Events
+from utils import tools
+
+
+def create_state(loop, redis, **options):
+    return State(
+        dispatch=None, handlers={}, hooks={}, http=None, loop=loop, redis=redis, id=0, **options
+    )
+
+
+async def add_members(redis, guild_id, *user_ids):
+    for user_id in user_ids:
+        key = f"member:{guild_id}:{user_id}"
+        user = {"id": str(user_id), "username": "", "discriminator": "0", "avatar": None}
+        await redis.set(key, orjson.dumps({"user": user, "roles": []}))
+        await redis.sadd("member_keys", key)
+
+
+async def test_lookup_builds_outside_lua(loop, redis, monkeypatch):
+    monkeypatch.setattr(state_module, "BUILD_CHUNK", 3)
+    state = create_state(loop, redis, index_ttl=60)
+    await add_members(redis, 1, *range(100, 110))
+    await redis.sadd("member_keys", "member:invalid")
+
+    results = await asyncio.gather(*[state._lookup("member", x) for x in range(100, 110)])
+
+    assert [x["_key"] for x in results] == [f"member:1:{x}" for x in range(100, 110)]
+    assert await redis.hlen("member_lookup") == 11
+    assert 0 < await redis.ttl("member_lookup") <= 60
+    assert await redis.keys("member_lookup_build*") == []
+
+
+async def test_lookup_missing_item(loop, redis):
+    state = create_state(loop, redis)
+    await add_members(redis, 1, 100)
+
+    assert await state._lookup("member", 200) is None
+    assert await state._lookup("member", 100) is not None
+
+    await redis.delete("member:1:100")
+
+    assert await state._lookup("member", 100) is None
+    assert not await redis.hexists("member_lookup", "100")
+
+
+async def test_lookup_waits_for_other_build(loop, redis):
+    state = create_state(loop, redis)
+    await add_members(redis, 1, 100)
+    await redis.set("member_lookup_build", 1)
+
+    task = loop.create_task(state._lookup("member", 100))
+    await asyncio.sleep(0.3)
+    assert not task.done()
+
+    await redis.hset("member_lookup", "100", "member:1:100")
+
+    assert (await task)["_key"] == "member:1:100"
+
+
+async def test_lookup_keeps_every_member_key(loop, redis, monkeypatch):
+    monkeypatch.setattr(state_module, "BUILD_CHUNK", 2)
+    state = create_state(loop, redis)
+    await add_members(redis, 1, 100, 101)
+    await add_members(redis, 2, 100)
+    await add_members(redis, 3, 100)
+
+    assert (await state._lookup("member", 100))["_key"] in [f"member:{x}:100" for x in [1, 2, 3]]
+    assert len((await redis.hget("member_lookup", "100")).split(b",")) == 3
+
+    for guild_id in [1, 2]:
+        await redis.delete(f"member:{guild_id}:100")
+        await state._lookup_remove("member", 100, f"member:{guild_id}:100")
+
+    assert (await state._lookup("member", 100))["_key"] == "member:3:100"
+    assert (await state.get_user(100)).id == 100
+
+
+async def test_lookup_prunes_stale_keys(loop, redis):
+    state = create_state(loop, redis)
+    await add_members(redis, 1, 100)
+    await add_members(redis, 2, 100)
+    await state._lookup("member", 100)
+
+    await redis.delete("member:1:100", "member:2:100")
+    await add_members(redis, 3, 100)
+    await state._lookup_add("member", 100, "member:3:100")
+    await state._lookup_add("member", 100, "member:3:100")
+
+    assert (await state._lookup("member", 100))["_key"] == "member:3:100"
+    assert await redis.hget("member_lookup", "100") == b"member:3:100"
+
+    await redis.delete("member:3:100")
+
+    assert await state._lookup("member", 100) is None
+    assert not await redis.hexists("member_lookup", "100")
+
+
+async def test_watch_invalidations(loop, redis):
+    state = create_state(loop, redis, cache=Cache(size=10, ttl=60))
+    task = loop.create_task(state.watch_invalidations())
+    await asyncio.sleep(0.1)
+
+    state._cache.set("guild:1", b"1")
+    state._cache.set("guild:2", b"2")
+    await redis.publish("state_invalidate", orjson.dumps(["guild:1"]))
+    await asyncio.sleep(0.1)
+
+    assert state._cache.get("guild:1") is None
+    assert state._cache.get("guild:2") == b"2"
+
+    await redis.publish("state_invalidate", b"invalid")
+    await asyncio.sleep(0.1)
+
+    assert len(state._cache) == 0
+
+    state._cache.set("guild:1", b"1")
+    redis._pool_or_conn._pubsub_conn.close()
+    await asyncio.sleep(0.1)
+
+    assert len(state._cache) == 0
+
+    state._cache.set("guild:2", b"2")
+    await asyncio.sleep(1.2)
+
+    assert len(state._cache) == 0
+
+    state._cache.set("guild:3", b"3")
+    await redis.publish("state_invalidate", orjson.dumps(["guild:3"]))
+    await asyncio.sleep(0.1)
+
+    assert state._cache.get("guild:3") is None
+    assert not task.done()
+
+    task.cancel()
+
+
+async def add_channels(redis, guild_id, channels):
+    for channel_id, topic in channels.items():
+        key = f"channel:{channel_id}"
+        await redis.set(key, orjson.dumps({"id": str(channel_id), "topic": topic}))
+        await redis.sadd(f"guild_keys:{guild_id}", key)
+
+
+async def test_tickets_keep_every_channel_of_a_user(loop, redis, monkeypatch):
+    monkeypatch.setattr(state_module, "BUILD_CHUNK", 2)
+    state = create_state(loop, redis)
+    await add_channels(
+        redis,
+        1,
+        {
+            10: "ModMail Channel 100 200",
+            11: "ModMail Channel 100 201",
+            12: "ModMail Channel 101 202",
+            13: "Not a ticket",
+        },
+    )
+
+    tickets = await state._tickets(1)
+    assert sorted(x["_key"] for x in tickets) == ["channel:10", "channel:11", "channel:12"]
+
+    tickets = await state._tickets(1, "100")
+    assert sorted(x["_key"] for x in tickets) == ["channel:10", "channel:11"]
+
+    await state._ticket_update(1, "channel:10")
+    await state._ticket_update(1, "channel:13", "101")
+    await redis.delete("channel:11")
+
+    assert await state._tickets(1, "100") == []
+
+    tickets = await state._tickets(1, "101")
+    assert sorted(x["_key"] for x in tickets) == ["channel:12", "channel:13"]
+    assert await redis.hgetall("ticket_index:1") == {
+        b"": b"",
+        b"channel:12": b"101",
+        b"channel:13": b"101",
+        b"user:101": b"channel:12,channel:13",
+    }
+
+
+async def test_message_lookup_builds_outside_lua(loop, redis):
+    state = create_state(loop, redis)
+
+    for message_id in range(600, 605):
+        key = f"message:2:{message_id}"
+        await redis.set(key, orjson.dumps({"id": str(message_id), "channel_id": "2"}))
+        await redis.sadd("message_keys", key)
+
+    result = await state._lookup("message", 603)
+
+    assert result["_key"] == "message:2:603"
+    assert await redis.hlen("message_lookup") == 6
+
+
+async def test_emoji_lookup_prunes_removed_emojis(loop, redis):
+    state = create_state(loop, redis)
+
+    for guild_id in [1, 2]:
+        key = f"emoji:{guild_id}:500"
+        await redis.set(key, orjson.dumps({"id": "500", "name": "emoji"}))
+        await redis.sadd("emoji_keys", key)
+
+    await redis.delete("emoji:1:500")
+    result = await state._lookup("emoji", 500)
+
+    assert result["_key"] == "emoji:2:500"
+    assert await redis.hget("emoji_lookup", "500") == b"emoji:2:500"
+
+
+async def test_member_update_refreshes_premium_slots(loop, redis, monkeypatch):
+    events = []
+    state = create_state(loop, redis)
+    state.dispatch = lambda event, *args: events.append((event, args))
+
+    user = {"id": "100", "username": "user", "discriminator": "0", "avatar": None}
+    old = {"user": user, "roles": [], "guild_id": "1"}
+    data = {"user": dict(user, username="renamed"), "roles": ["5"], "guild_id": "1"}
+    await redis.set("guild:1", orjson.dumps({"id": "1", "name": "guild"}))
+    await redis.set("member:1:100", orjson.dumps(data))
+
+    await state.parse_guild_member_update(data, old)
+
+    assert [x[0] for x in events] == ["user_update", "member_update"]
+    before, after = events[1][1]
+    assert list(before._roles) == [] and list(after._roles) == [5]
+
+    refreshed = []
+
+    async def refresh_premium_slots(bot, user_id, member):
+        refreshed.append((user_id, member))
+
+    monkeypatch.setattr(tools, "refresh_premium_slots", refresh_premium_slots)
+    bot = SimpleNamespace(config=SimpleNamespace(MAIN_SERVER="1"))
+    await Events(bot).on_member_update(before, after)
+
+    assert refreshed == [(100, after)]
+
+
+async def test_member_update_stores_user(loop, redis):
+    events = []
+    state = create_state(loop, redis)
+    state.dispatch = lambda event, *args: events.append((event, args))
+
+    user = {"id": "100", "username": "user", "discriminator": "0", "avatar": None}
+    data = {"user": user, "roles": [], "guild_id": "1", "nick": "nick"}
+    await redis.set("guild:1", orjson.dumps({"id": "1", "name": "guild"}))
+    await redis.set("member:1:100", orjson.dumps(data))
+
+    await state.parse_guild_member_update(data, None)
+
+    assert events == []
+    assert orjson.loads(await redis.get("user:100")) == user
+
+    await state.parse_guild_member_update(data, dict(data, nick=None))
+
+    assert [x[0] for x in events] == ["member_update"]
+    assert [x.nick for x in events[0][1]] == [None, "nick"]
+
+
+async def test_guild_update_dispatches_old_guild(loop, redis):
+    events = []
+    state = create_state(loop, redis)
+    state.dispatch = lambda event, *args: events.append((event, args))
+
+    await redis.set("guild:1", orjson.dumps({"id": "1", "name": "new"}))
+    await state.parse_guild_update({"id": "1", "name": "new"}, {"id": "1", "name": "old"})
+
+    assert [x[0] for x in events] == ["guild_update"]
+    assert [x.name for x in events[0][1]] == ["old", "new"]
+
+    guild = copy.copy(events[0][1][1])
+    assert (guild.id, guild.name, guild._state) == (1, "new", state)
+
+
+async def test_index_builds_outside_lua(loop, redis, monkeypatch):
+    monkeypatch.setattr(state_module, "BUILD_CHUNK", 3)
+    state = create_state(loop, redis, index_ttl=60)
+    await redis.sadd("guild_keys:1", *[f"member:1:{x}" for x in range(10)], "role:1:5")
+
+    results = await asyncio.gather(*[state._index("member", 1) for _ in range(3)])
+
+    assert [sorted(x) for x in results] == [sorted(f"member:1:{x}" for x in range(10))] * 3
+    assert await redis.scard("member_index:1") == 11
+    assert 0 < await redis.ttl("member_index:1") <= 60
+    assert await redis.keys("member_index:1_build*") == []
+
+
+async def test_channel_roles_build_role_index(loop, redis):
+    state = create_state(loop, redis)
+    await redis.set("channel:10", orjson.dumps({"id": "10", "type": 0, "guild_id": "1"}))
+    await redis.set("guild:1", orjson.dumps({"id": "1", "name": "guild"}))
+    await redis.set("role:1:5", orjson.dumps({"id": "5", "name": "role"}))
+    await redis.sadd("guild_keys:1", "channel:10", "role:1:5")
+
+    channel = await state._get_channel(10, roles=True)
+
+    assert channel.guild._role_data == [{"id": "5", "name": "role"}]
+    assert sorted(await redis.smembers("role_index:1")) == [b"", b"role:1:5"]
+
+
+async def test_ticket_update_moves_channel_between_users(loop, redis):
+    state = create_state(loop, redis)
+    await add_channels(redis, 1, {10: "ModMail Channel 100 200", 11: "ModMail Channel 100 201"})
+    await state._tickets(1)
+
+    await state._ticket_update(1, "channel:10", "101")
+
+    assert [x["_key"] for x in await state._tickets(1, "100")] == ["channel:11"]
+    assert [x["_key"] for x in await state._tickets(1, "101")] == ["channel:10"]
+    assert await redis.hget("ticket_index:1", "user:100") == b"channel:11"
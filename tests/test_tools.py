@@ -0,0 +1,77 @@
+from types import SimpleNamespace
+
+from classes.config import COLUMNS
+from tests.test_consumer import Prom
+from tests.test_state import create_state
+from utils import tools
+
+
+class Connection:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = []
+
+    async def fetchrow(self, query, *args):
+        self.queries.append(query.split()[0])
+
+        if query.startswith("INSERT"):
+            self.rows[args[0]] = dict(zip(COLUMNS.values(), args))
+
+        return self.rows.get(args[0])
+
+
+class Pool:
+    def __init__(self, rows):
+        self.conn = Connection(rows)
+
+    def acquire(self):
+        return self
+
+    async def __aenter__(self):
+        return self.conn
+
+    async def __aexit__(self, *args):
+        pass
+
+
+def row(guild, category=None):
+    return dict({x: None for x in COLUMNS.values()}, guild=guild, category=category)
+
+
+def create_bot(loop, redis, rows):
+    return SimpleNamespace(
+        state=create_state(loop, redis),
+        pool=Pool(rows),
+        prom=Prom(),
+        config=SimpleNamespace(GUILD_CONFIG_TTL="60"),
+    )
+
+
+async def test_guild_config_is_cached_until_invalidated(loop, redis):
+    bot = create_bot(loop, redis, {1: row(1, 10)})
+
+    assert (await tools.get_data(bot, 1)).category == 10
+    assert (await tools.get_data(bot, 1)).category == 10
+    assert bot.pool.conn.queries == ["SELECT"]
+
+    bot.pool.conn.rows[1] = row(1, 20)
+    await tools.invalidate_data(bot, 1)
+
+    assert (await tools.get_data(bot, 1)).category == 20
+    assert bot.pool.conn.queries == ["SELECT", "SELECT"]
+    assert bot.prom.guild_config.values == [
+        {"result": "miss"},
+        {"result": "hit"},
+        {"result": "miss"},
+    ]
+
+
+async def test_find_data_does_not_insert(loop, redis):
+    bot = create_bot(loop, redis, {})
+
+    assert await tools.find_data(bot, 1) is None
+    assert bot.pool.conn.queries == ["SELECT"]
+
+    assert (await tools.get_data(bot, 1)).category is None
+    assert bot.pool.conn.queries == ["SELECT", "SELECT", "INSERT"]
+    assert (await tools.find_data(bot, 1)).guild == 1
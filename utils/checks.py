@@ -34,10 +34,9 @@ def is_admin():
 
 def in_database():
     async def predicate(ctx):
-        async with ctx.bot.pool.acquire() as conn:
-            res = await conn.fetchrow("SELECT category FROM data WHERE guild=$1", ctx.guild.id)
+        data = await tools.find_data(ctx.bot, ctx.guild.id)
 
-        if not res or not res[0]:
+        if not data or not data.category:
             await ctx.send(
                 ErrorEmbed(f"Your server has not been set up yet. Use `{ctx.prefix}setup` first.")
             )
@@ -53,12 +52,7 @@ def is_premium():
         if not ctx.bot.config.MAIN_SERVER:
             return True
 
-        async with ctx.bot.pool.acquire() as conn:
-            res = await conn.fetchrow(
-                "SELECT identifier FROM premium WHERE $1=any(guild)", ctx.guild.id
-            )
-
-        if not res:
+        if not await tools.is_premium_guild(ctx.bot, ctx.guild.id):
             await ctx.send(
                 ErrorEmbed(
                     "This server does not have premium. Want to get premium? More information is "
@@ -115,7 +109,7 @@ def is_mod():
         if (await ctx.message.member.guild_permissions()).administrator:
             return True
 
-        for role in (await tools.get_data(ctx.bot, ctx.guild.id))[3]:
+        for role in (await tools.get_data(ctx.bot, ctx.guild.id)).access_roles:
             if role in ctx.message.member._roles:
                 return True
 
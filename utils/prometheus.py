@@ -4,9 +4,11 @@ import os
 import platform
 import resource
 
-from aioprometheus import Counter, Gauge
+from aioprometheus import Counter, Gauge, Histogram
 from aioprometheus.service import Service
 
+LATENCY_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
 
 class Prometheus:
     def __init__(self, bot):
@@ -39,10 +41,84 @@ class Prometheus:
         self.collections = Counter("python_gc_collections", "Number of times collected by GC.")
 
         self.http = Counter("modmail_http_requests", "Number of http requests sent.")
+        self.http_latency = Histogram(
+            "modmail_http_latency_seconds",
+            "Seconds taken by http requests to Discord.",
+            buckets=LATENCY_BUCKETS,
+        )
+        self.http_ratelimit_remaining = Gauge(
+            "modmail_http_ratelimit_remaining", "Requests left in each rate limit bucket."
+        )
+        self.http_ratelimited = Counter(
+            "modmail_http_ratelimited", "Number of http requests that were rate limited."
+        )
+        self.http_global_ratelimited = Counter(
+            "modmail_http_global_ratelimited", "Number of http requests that hit the global limit."
+        )
         self.commands = Counter("modmail_commands", "Number of commands used.")
         self.tickets = Counter("modmail_tickets", "Number of tickets created.")
         self.tickets_message = Counter("modmail_tickets_message", "Number of ticket messages sent.")
 
+        self.events = Counter("modmail_events", "Number of gateway events handled.")
+        self.events_dropped = Counter(
+            "modmail_events_dropped", "Number of disabled events dropped before decoding."
+        )
+        self.events_duplicate = Counter(
+            "modmail_events_duplicate", "Number of duplicate deliveries skipped."
+        )
+        self.events_shed = Counter("modmail_events_shed", "Number of events shed under load.")
+        self.shed_mode = Gauge(
+            "modmail_shed_mode", "Load shedding mode, 0 normal, 1 shed and 2 overload."
+        )
+        self.events_inflight = Gauge(
+            "modmail_events_inflight", "Number of gateway events received but not yet acked."
+        )
+        self.queue_depth = Gauge("modmail_queue_depth", "Number of messages waiting in the queue.")
+        self.event_fetches = Counter(
+            "modmail_event_fetches", "Number of memoised lookups fetched during events."
+        )
+        self.event_fetches_saved = Counter(
+            "modmail_event_fetches_saved", "Number of lookups answered by the event memo."
+        )
+
+        self.queue_latency = Histogram(
+            "modmail_queue_latency_seconds",
+            "Seconds between receiving an event and starting to handle it.",
+            buckets=LATENCY_BUCKETS,
+        )
+        self.parse_latency = Histogram(
+            "modmail_parse_latency_seconds",
+            "Seconds spent parsing an event into state.",
+            buckets=LATENCY_BUCKETS,
+        )
+        self.handler_latency = Histogram(
+            "modmail_handler_latency_seconds",
+            "Seconds spent in an event listener.",
+            buckets=LATENCY_BUCKETS,
+        )
+        self.event_latency = Histogram(
+            "modmail_event_latency_seconds",
+            "Seconds between receiving an event and all its listeners finishing.",
+            buckets=LATENCY_BUCKETS,
+        )
+
+        self.guild_config = Counter(
+            "modmail_guild_config", "Number of guild config reads by cache result."
+        )
+
+        self.state_cache_hits = Counter("modmail_state_cache_hits", "Number of state cache hits.")
+        self.state_cache_misses = Counter(
+            "modmail_state_cache_misses", "Number of state cache misses."
+        )
+        self.state_cache_evictions = Counter(
+            "modmail_state_cache_evictions", "Number of state cache evictions."
+        )
+        self.state_batch_size = Histogram(
+            "modmail_state_batch_size",
+            "Number of keys fetched per batched state read.",
+            buckets=[1, 2, 4, 8, 16, 32, 64, 128],
+        )
+
     async def start(self):
         await self.msvr.start(addr="127.0.0.1", port=6100 + self.bot.cluster)
         self.msvr._runner._server._kwargs["access_log"] = None
@@ -1,18 +1,26 @@
+import asyncio
 import logging
 import time
 
+import aioredis
 import discord
+import orjson
 
 from discord.http import Route
 from discord.user import User
 
+from classes import memo
 from classes.channel import DMChannel
+from classes.config import GuildConfig
 from classes.embed import Embed, ErrorEmbed
 from classes.http import HTTPClient
 from classes.message import Message
 
 log = logging.getLogger(__name__)
 
+MENU_TIMEOUT = 180
+MENU_GRACE = 300
+
 
 def create_fake_user(user_id):
     return User(
@@ -58,26 +66,12 @@ async def create_paginator(bot, ctx, pages):
 
     msg = await ctx.send(pages[0])
 
-    for reaction in ["⏮️", "◀️", "⏹️", "▶️", "⏭️"]:
-        await msg.add_reaction(reaction)
+    bot.reactions.add(msg, "⏮️", "◀️", "⏹️", "▶️", "⏭️")
 
-    await bot.state.set(
-        f"reaction_menu:{msg.channel.id}:{msg.id}",
-        {
-            "kind": "paginator",
-            "end": int(time.time()) + 180,
-            "data": {
-                "page": 0,
-                "all_pages": [page.to_dict() for page in pages],
-            },
-        },
-    )
-    await bot.state.sadd("reaction_menu_keys", f"reaction_menu:{msg.channel.id}:{msg.id}")
+    await create_reaction_menu(bot, msg, "paginator", {}, pages)
 
 
 async def select_guild(bot, message, msg):
-    guilds = {}
-
     user_guilds = await get_user_guilds(bot, message.author)
     if user_guilds is None:
         embed = Embed(
@@ -97,70 +91,106 @@ async def select_guild(bot, message, msg):
 
         return
 
-    for guild in user_guilds:
-        guild = await bot.get_guild(guild)
-        if guild is None:
-            continue
-
-        channel = None
-        for text_channel in await guild.text_channels():
-            if is_modmail_channel(text_channel, message.author.id):
-                channel = text_channel
-
-        if not channel:
-            guilds[str(guild.id)] = (guild.name, False)
-        else:
-            guilds[str(guild.id)] = (guild.name, True)
+    guilds = await bot.get_guilds(user_guilds)
+    guilds = [guilds[x] for x in user_guilds if x in guilds]
 
     if len(guilds) == 0:
         await message.channel.send(ErrorEmbed("Oops, something strange happened. No server found."))
         return
 
-    embeds = []
+    semaphore = asyncio.Semaphore(int(bot.config.SELECT_GUILD_CONCURRENCY or 10))
 
-    for chunk in [list(guilds.items())[i : i + 10] for i in range(0, len(guilds), 10)]:
-        embed = Embed(
-            "Select Server",
-            "Please select the server you want to send this message to. You can do so by reacting "
-            "with the corresponding emote.",
-        )
+    async def has_ticket(guild):
+        async with semaphore:
+            return await guild.ticket_channel(message.author.id) is not None
 
-        if len(guilds) > 10:
-            embed.set_footer("Use the reactions to flip pages.")
+    tasks = [bot.loop.create_task(has_ticket(x)) for x in guilds]
 
-        for guild, value in chunk:
-            embed.add_field(
-                f"{len(embed.fields) + 1}: {value[0]}",
-                f"{'Create a new ticket.' if value[1] is False else 'Existing ticket.'}\n"
-                f"Server ID: {guild}",
+    try:
+        for index in range(0, len(guilds), 10):
+            embed = Embed(
+                "Select Server",
+                "Please select the server you want to send this message to. You can do so by "
+                "reacting with the corresponding emote.",
             )
 
-        embeds.append(embed)
+            if len(guilds) > 10:
+                embed.set_footer("Use the reactions to flip pages.")
 
-    await msg.edit(embeds[0])
+            chunk = guilds[index : index + 10]
+            for guild, ticket in zip(chunk, await asyncio.gather(*tasks[index : index + 10])):
+                embed.add_field(
+                    f"{len(embed.fields) + 1}: {guild.name}",
+                    f"{'Existing ticket.' if ticket else 'Create a new ticket.'}\n"
+                    f"Server ID: {guild.id}",
+                )
 
-    if len(guilds) > 10:
-        await msg.add_reaction("◀️")
-        await msg.add_reaction("▶️")
+            if index > 0:
+                await set_reaction_menu_pages(bot, msg, [embed], index // 10)
+                continue
 
-    emojis = ["1⃣", "2⃣", "3⃣", "4⃣", "5⃣", "6⃣", "7⃣", "8⃣", "9⃣", "🔟"]
+            await msg.edit(embed)
 
-    for reaction in emojis[: len(embeds[0].fields)]:
-        await msg.add_reaction(reaction)
+            if len(guilds) > 10:
+                bot.reactions.add(msg, "◀️", "▶️")
+
+            emojis = ["1⃣", "2⃣", "3⃣", "4⃣", "5⃣", "6⃣", "7⃣", "8⃣", "9⃣", "🔟"]
+            bot.reactions.add(msg, *emojis[: len(embed.fields)])
+
+            await create_reaction_menu(
+                bot, msg, "selection", {"msg": message._data}, [embed], (len(guilds) + 9) // 10
+            )
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def create_reaction_menu(bot, msg, kind, data, pages=None, count=None):
+    key = f"reaction_menu:{msg.channel.id}:{msg.id}"
+
+    if pages is not None:
+        data["page"] = 0
+        data["pages"] = count or len(pages)
+
+        await set_reaction_menu_pages(bot, msg, pages)
 
     await bot.state.set(
-        f"reaction_menu:{msg.channel.id}:{msg.id}",
-        {
-            "kind": "selection",
-            "end": int(time.time()) + 180,
-            "data": {
-                "msg": message._data,
-                "page": 0,
-                "all_pages": [embed.to_dict() for embed in embeds],
-            },
-        },
+        key,
+        {"kind": kind, "end": int(time.time()) + MENU_TIMEOUT, "data": data},
+        expire=MENU_TIMEOUT + MENU_GRACE,
+    )
+    await bot.state.sadd("reaction_menu_keys", key)
+
+
+async def set_reaction_menu_pages(bot, msg, pages, start=0):
+    await bot.state.hset(
+        f"reaction_menu_pages:{msg.channel.id}:{msg.id}",
+        {str(index): page.to_dict() for index, page in enumerate(pages, start)},
+        expire=MENU_TIMEOUT + MENU_GRACE,
+    )
+
+
+async def update_reaction_menu(bot, channel, message, menu):
+    menu["end"] = int(time.time()) + MENU_TIMEOUT
+
+    await bot.state.set(
+        f"reaction_menu:{channel.id}:{message.id}", menu, expire=MENU_TIMEOUT + MENU_GRACE
+    )
+    await bot.state.expire(
+        f"reaction_menu_pages:{channel.id}:{message.id}", MENU_TIMEOUT + MENU_GRACE
+    )
+
+
+async def get_reaction_menu_page(bot, channel, message, page):
+    return await bot.state.hget(f"reaction_menu_pages:{channel.id}:{message.id}", str(page))
+
+
+async def delete_reaction_menu(bot, channel, message):
+    await bot.state.delete(
+        f"reaction_menu:{channel.id}:{message.id}",
+        f"reaction_menu_pages:{channel.id}:{message.id}",
     )
-    await bot.state.sadd("reaction_menu_keys", f"reaction_menu:{msg.channel.id}:{msg.id}")
+    await bot.state.srem("reaction_menu_keys", f"reaction_menu:{channel.id}:{message.id}")
 
 
 async def get_reaction_menu(bot, payload, kind):
@@ -175,35 +205,74 @@ async def get_reaction_menu(bot, payload, kind):
 
 
 async def get_data(bot, guild):
+    return await memo.memoize(("data", guild), lambda: _get_data(bot, guild))
+
+
+async def find_data(bot, guild):
+    return await _get_data(bot, guild, create=False)
+
+
+async def _get_data(bot, guild, create=True):
+    version, cached = await bot.state.redis.mget(
+        f"guild_config_version:{guild}", f"guild_config:{guild}"
+    )
+    version = int(version or 0)
+
+    if cached is not None:
+        cached = orjson.loads(cached)
+        if cached["version"] == version:
+            bot.prom.guild_config.inc({"result": "hit"})
+            return GuildConfig(**cached["data"])
+
+    bot.prom.guild_config.inc({"result": "miss"})
+
     async with bot.pool.acquire() as conn:
         res = await conn.fetchrow("SELECT * FROM data WHERE guild=$1", guild)
-        if res:
-            return res
+        if not res and not create:
+            return None
+        elif not res:
+            res = await conn.fetchrow(
+                "INSERT INTO data VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, "
+                "$14) RETURNING *",
+                guild,
+                None,
+                None,
+                [],
+                None,
+                None,
+                None,
+                0,
+                [],
+                [],
+                False,
+                False,
+                None,
+                None,
+            )
 
-        return await conn.fetchrow(
-            "INSERT INTO data VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14) "
-            "RETURNING *",
-            guild,
-            None,
-            None,
-            [],
-            None,
-            None,
-            None,
-            0,
-            [],
-            [],
-            False,
-            False,
-            None,
-            None,
-        )
+    config = GuildConfig.from_record(res)
+    await bot.state.set(
+        f"guild_config:{guild}",
+        {"version": version, "data": config.to_dict()},
+        expire=int(bot.config.GUILD_CONFIG_TTL or 3600),
+    )
+
+    return config
+
+
+async def invalidate_data(bot, guild):
+    memo.forget(("data", guild))
+    await bot.state.redis.incr(f"guild_config_version:{guild}")
 
 
 async def get_guild_prefix(bot, guild):
     if not guild:
         return bot.config.DEFAULT_PREFIX
 
+    return await memo.memoize(("prefix", guild.id), lambda: _get_guild_prefix(bot, guild))
+
+
+async def _get_guild_prefix(bot, guild):
     prefix = await bot.state.get(f"prefix:{guild.id}", False)
     if prefix == "":
         return bot.config.DEFAULT_PREFIX
@@ -227,17 +296,45 @@ async def get_user_settings(bot, user):
 
 
 async def get_user_guilds(bot, member):
-    user_guilds = await bot.state.get(f"user_guilds:{member.id}")
-    if user_guilds is not None:
-        return [int(guild) for guild in user_guilds]
+    key = f"user_guilds:{member.id}"
+    ttl = int(bot.config.USER_GUILDS_TTL or 3600)
+
+    tr = bot.state.redis.multi_exec()
+    tr.sinter(key, "guild_keys")
+    tr.ttl(key)
+    guilds, remaining = await tr.execute()
+
+    if remaining < 0:
+        if not await refresh_user_guilds(bot, member.id):
+            return None
+
+        guilds = await bot.state.redis.sinter(key, "guild_keys")
+    elif remaining < ttl // 2 and await bot.state.redis.set(
+        f"user_guilds_refresh:{member.id}",
+        1,
+        expire=60,
+        exist=aioredis.Redis.SET_IF_NOT_EXIST,
+    ):
+        bot.loop.create_task(_refresh_user_guilds(bot, member.id))
 
-    token = await bot.state.get(f"user_token:{member.id}", False)
+    return [int(guild.decode("utf-8")[6:]) for guild in guilds]
+
+
+async def _refresh_user_guilds(bot, user):
+    try:
+        await refresh_user_guilds(bot, user)
+    except Exception:
+        log.exception(f"Failed to refresh the guilds of user {user}.")
+
+
+async def refresh_user_guilds(bot, user):
+    token = await bot.state.get(f"user_token:{user}", False)
     if token is None:
         async with bot.pool.acquire() as conn:
-            res = await conn.fetchrow("SELECT token FROM account WHERE identifier=$1", member.id)
+            res = await conn.fetchrow("SELECT token FROM account WHERE identifier=$1", user)
 
         if not res or not res[0]:
-            return None
+            return False
 
         async with bot.session.post(
             f"{Route.BASE}/oauth2/token",
@@ -252,21 +349,21 @@ async def get_user_guilds(bot, member):
                 async with bot.pool.acquire() as conn:
                     await conn.execute(
                         "UPDATE account SET token=NULL WHERE identifier=$1",
-                        member.id,
+                        user,
                     )
-                return None
+                return False
 
             response = await response.json()
 
         token = response["access_token"]
-        await bot.state.set(f"user_token:{member.id}", token)
-        await bot.state.expire(f"user_token:{member.id}", response["expires_in"])
+        await bot.state.set(f"user_token:{user}", token)
+        await bot.state.expire(f"user_token:{user}", response["expires_in"])
 
         async with bot.pool.acquire() as conn:
             await conn.execute(
                 "UPDATE account SET token=$1 WHERE identifier=$2",
                 response["refresh_token"],
-                member.id,
+                user,
             )
 
     http = HTTPClient()
@@ -276,37 +373,84 @@ async def get_user_guilds(bot, member):
     try:
         guilds = [guild["id"] for guild in await http.get_guilds(200)]
     except discord.HTTPException:
-        await bot.state.delete(f"user_token:{member.id}")
-        return await get_user_guilds(bot, member)
+        await bot.state.delete(f"user_token:{user}")
+        return await refresh_user_guilds(bot, user)
 
-    await bot.state.set(f"user_guilds:{member.id}", guilds)
-    await bot.state.expire(f"user_guilds:{member.id}", 10)
+    tr = bot.state.redis.multi_exec()
+    tr.delete(f"user_guilds:{user}")
+    tr.sadd(f"user_guilds:{user}", "", *[f"guild:{guild}" for guild in guilds])
+    tr.expire(f"user_guilds:{user}", int(bot.config.USER_GUILDS_TTL or 3600))
+    await tr.execute()
 
-    return [int(guild) for guild in guilds]
+    return True
 
 
 async def get_premium_slots(bot, user):
     if str(user) in bot.config.OWNER_USERS.split(",") + bot.config.ADMIN_USERS.split(","):
         return 1000
 
-    guild = await bot.get_guild(int(bot.config.MAIN_SERVER))
-    if guild:
-        member = await guild.fetch_member(user)
-        if member:
-            if int(bot.config.PREMIUM5_ROLE) in member._roles:
-                return 5
-            elif int(bot.config.PREMIUM3_ROLE) in member._roles:
-                return 3
-            elif int(bot.config.PREMIUM1_ROLE) in member._roles:
-                return 1
+    slots = await bot.state.get(f"premium_slots:{user}")
+    if slots is None:
+        slots = await refresh_premium_slots(bot, user)
+
+    return slots
+
+
+async def refresh_premium_slots(bot, user, member=None):
+    if member is None:
+        guild = await bot.get_guild(int(bot.config.MAIN_SERVER))
+        if guild:
+            member = await guild.get_member(user)
+            if member is None:
+                try:
+                    member = await guild.fetch_member(user)
+                except discord.NotFound:
+                    pass
+
+    slots = 0
+    if member:
+        if int(bot.config.PREMIUM5_ROLE) in member._roles:
+            slots = 5
+        elif int(bot.config.PREMIUM3_ROLE) in member._roles:
+            slots = 3
+        elif int(bot.config.PREMIUM1_ROLE) in member._roles:
+            slots = 1
+
+    if slots == 0:
+        async with bot.pool.acquire() as conn:
+            res = await conn.fetchrow("SELECT guild FROM premium WHERE identifier=$1", user)
 
-    async with bot.pool.acquire() as conn:
-        res = await conn.fetchrow("SELECT guild FROM premium WHERE identifier=$1", user)
+        if res:
+            slots = 1
 
-    if res:
-        return 1
+    await bot.state.set(
+        f"premium_slots:{user}", slots, expire=int(bot.config.PREMIUM_CACHE_TTL or 3600)
+    )
+
+    return slots
+
+
+async def is_premium_guild(bot, guild):
+    tr = bot.state.redis.multi_exec()
+    tr.exists("premium_guilds")
+    tr.sismember("premium_guilds", guild)
+    loaded, premium = await tr.execute()
+
+    if not loaded:
+        await load_premium_guilds(bot)
+        return await bot.state.sismember("premium_guilds", guild)
 
-    return 0
+    return bool(premium)
+
+
+async def load_premium_guilds(bot):
+    async with bot.pool.acquire() as conn:
+        res = await conn.fetch("SELECT unnest(guild) FROM premium")
+
+    tr = bot.state.redis.multi_exec()
+    tr.delete("premium_guilds")
+    tr.sadd("premium_guilds", "", *[x[0] for x in res])
+    await tr.execute()
 
 
 async def remove_premium(bot, guild):
@@ -321,6 +465,9 @@ async def remove_premium(bot, guild):
         )
         await conn.execute("DELETE FROM snippet WHERE guild=$1", guild)
 
+    await bot.state.srem("premium_guilds", guild)
+    await invalidate_data(bot, guild)
+
 
 async def is_user_banned(bot, user):
     return await bot.state.sismember("banned_users", user.id)